@@ -0,0 +1,66 @@
+"""
+Content-addressed on-disk store for immutable API payloads
+Payloads are written once under their SHA-256; a small index maps request keys to hashes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+
+class ContentStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._index: Dict[str, str] = self._load_index()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        digest = self._index.get(key)
+        if digest is None:
+            self.misses += 1
+            return None
+        try:
+            with open(self._object_path(digest), encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # A missing or damaged object is simply fetched again
+            del self._index[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: Any):
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._atomic_write(path, data)
+        if self._index.get(key) != digest:
+            self._index[key] = digest
+            self._atomic_write(self.index_path, json.dumps(self._index))
+
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._index), "hits": self.hits, "misses": self.misses}
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.json")
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _atomic_write(self, path: str, data: str):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, path)
@@ -0,0 +1,282 @@
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.mcp import MCPServer
+from mcp_middleware import MiddlewareMCPServerStdio
+
+EARTH_RADIUS_KM = 6378.137
+
+
+async def find_tool(mcp_servers: List[MCPServer], tool_names: List[str]) -> Optional[Tuple[MCPServer, str]]:
+    """Return the first (server, tool name) pair whose server lists one of `tool_names`"""
+    for tool_name in tool_names:
+        for server in mcp_servers:
+            tools = await server.list_tools()
+            if any(tool.name == tool_name for tool in tools):
+                return server, tool_name
+    return None
+
+
+def parse_tool_result(result) -> Optional[Any]:
+    """Decode the JSON text content of an MCP CallToolResult, or None on failure"""
+    if result.isError:
+        return None
+    for item in result.content:
+        if getattr(item, "type", None) == "text":
+            try:
+                return json.loads(item.text)
+            except json.JSONDecodeError:
+                return None
+    return None
+
+
+class FastPathRoute:
+    """A query pattern answered by a single tool call and a response template.
+
+    `patterns` must match the whole normalized query, so anything with extra
+    intent ("...and when will it pass over Paris?") falls through to the agent.
+    `arguments` may return None to leave a matched but implausible query to the agent.
+    """
+
+    def __init__(self, name: str, patterns: List[str], tool_names: List[str],
+                 template: Callable[[Any, Dict[str, Any]], Optional[str]],
+                 arguments: Optional[Callable[[re.Match], Optional[Dict[str, Any]]]] = None):
+        self.name = name
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.tool_names = tool_names
+        self.template = template
+        self.arguments = arguments or (lambda match: {})
+
+    def match(self, query: str) -> Optional[re.Match]:
+        for pattern in self.patterns:
+            match = pattern.fullmatch(query)
+            if match:
+                return match
+        return None
+
+
+class FastPathRouter:
+    """Answers simple single-tool queries without a model round trip"""
+
+    def __init__(self, routes: List[FastPathRoute], mcp_servers: List[MCPServer]):
+        self.routes = routes
+        self.mcp_servers = mcp_servers
+        self.queries = 0
+        self.hits: Dict[str, int] = {}
+        self.fallbacks = 0
+
+    async def try_answer(self, user_input: str) -> Optional[Tuple[str, str]]:
+        """Return (route name, answer) for a recognized query, or None to use the agent"""
+        self.queries += 1
+        query = self._normalize(user_input)
+
+        for route in self.routes:
+            match = route.match(query)
+            if not match:
+                continue
+
+            answer = await self._answer(route, match)
+            if answer is None:
+                self.fallbacks += 1
+                return None
+
+            self.hits[route.name] = self.hits.get(route.name, 0) + 1
+            return route.name, answer
+
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        return {
+            "queries": self.queries,
+            "hits": hits,
+            "fallbacks": self.fallbacks,
+            "hit_rate": round(hits / self.queries, 3) if self.queries else 0.0,
+            "routes": dict(self.hits),
+        }
+
+    async def _answer(self, route: FastPathRoute, match: re.Match) -> Optional[str]:
+        try:
+            arguments = route.arguments(match)
+            if arguments is None:
+                return None
+            found = await find_tool(self.mcp_servers, route.tool_names)
+            if found is None:
+                return None
+            server, tool_name = found
+            if isinstance(server, MiddlewareMCPServerStdio):
+                # Templates condense the full result themselves; shaping would drop entries they count
+                result = await server.call_tool(tool_name, arguments, shape=False)
+            else:
+                result = await server.call_tool(tool_name, arguments)
+            data = parse_tool_result(result)
+            if data is None or (isinstance(data, dict) and data.get("success") is False):
+                return None
+            return route.template(data, arguments)
+        except Exception:
+            # Any surprise (shape changes, server errors) is left to the full agent
+            return None
+
+    def _normalize(self, text: str) -> str:
+        text = text.lower().replace("’", "'")
+        text = re.sub(r"[?!.,]+(\s|$)", " ", text)
+        return " ".join(text.split())
+
+
+def _format_timestamp(timestamp: Optional[int]) -> str:
+    if not timestamp:
+        return "unknown time"
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def _iss_position_template(data: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    latitude = data["latitude"]
+    longitude = data["longitude"]
+    return (
+        "**International Space Station — current position**\n\n"
+        f"- Latitude: {latitude:.4f}°\n"
+        f"- Longitude: {longitude:.4f}°\n"
+        f"- As of: {_format_timestamp(data.get('timestamp'))}\n\n"
+        f"Map: https://www.openstreetmap.org/?mlat={latitude:.4f}&mlon={longitude:.4f}&zoom=3"
+    )
+
+
+def _people_in_space_template(data: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    by_craft: Dict[str, List[str]] = {}
+    for person in data.get("people", []):
+        by_craft.setdefault(person.get("craft", "Unknown craft"), []).append(person.get("name", "Unknown"))
+
+    lines = [f"**{data.get('number', 0)} people are currently in space**\n"]
+    for craft, names in sorted(by_craft.items()):
+        lines.append(f"- **{craft}**: {', '.join(names)}")
+    return "\n".join(lines)
+
+
+def _orbital_period_template(data: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    period = data["orbital_period"]
+    return (
+        f"**Orbital period for a semi-major axis of {data['semi_major_axis_km']:,.1f} km**\n\n"
+        f"- {period['minutes']:,} minutes ({period['hours']} hours, {period['seconds']:,} s)\n\n"
+        "Computed with Kepler's third law, T = 2π·√(a³/μ), assuming a circular, "
+        "unperturbed two-body orbit around Earth (μ = 398,600.4418 km³/s²)."
+    )
+
+
+def _orbital_period_arguments(match: re.Match) -> Optional[Dict[str, Any]]:
+    value = float(match.group("value"))
+    if match.group("altitude"):
+        value += EARTH_RADIUS_KM
+    elif value < EARTH_RADIUS_KM:
+        # Most likely an altitude given without saying so
+        return None
+    return {"semi_major_axis": round(value, 3)}
+
+
+def _tle_template(data: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+    lines = ["**Two-Line Element sets**\n"]
+    for key, satellite in data.get("satellites", {}).items():
+        lines.append(f"**{satellite.get('name', key)}**\n```\n{satellite['line1']}\n{satellite['line2']}\n```")
+    if data.get("note"):
+        lines.append(f"_{data['note']}_")
+    return "\n".join(lines)
+
+
+def _apod_template(data: Any, arguments: Dict[str, Any]) -> Optional[str]:
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict) or "title" not in data:
+        return None
+
+    lines = [f"**{data['title']}** ({data.get('date', 'today')})\n"]
+    if data.get("explanation"):
+        lines.append(data["explanation"] + "\n")
+    if data.get("hdurl") or data.get("url"):
+        lines.append(f"- {data.get('media_type', 'image').capitalize()}: {data.get('hdurl') or data.get('url')}")
+    if data.get("copyright"):
+        lines.append(f"- Credit: {data['copyright'].strip()}")
+    return "\n".join(lines)
+
+
+def _collections_template(data: Any, arguments: Dict[str, Any]) -> Optional[str]:
+    collections = data.get("collections") if isinstance(data, dict) else data
+    if not isinstance(collections, list):
+        return None
+
+    lines = [f"**{len(collections)} STAC collections available**\n"]
+    for collection in collections[:40]:
+        if isinstance(collection, dict):
+            title = collection.get("title")
+            lines.append(f"- `{collection.get('id')}`" + (f" — {title}" if title else ""))
+    if len(collections) > 40:
+        lines.append(f"- ... and {len(collections) - 40} more")
+    return "\n".join(lines)
+
+
+_ISS = r"(the )?(iss|international space station|space station)"
+_NOW = r"( (now|right now|currently|at the moment|today))?"
+
+ORBITAL_ROUTES = [
+    FastPathRoute(
+        "iss_position",
+        [
+            rf"(where is|where's) {_ISS}{_NOW}",
+            rf"(what is |what's )?(the )?(current )?(position|location) of {_ISS}{_NOW}",
+            rf"(current )?{_ISS} (position|location){_NOW}",
+        ],
+        ["get_iss_position"],
+        _iss_position_template,
+    ),
+    FastPathRoute(
+        "people_in_space",
+        [
+            rf"(who is|who's|who are)( currently)? in space{_NOW}",
+            rf"how many (people|astronauts|humans) are( currently)? in space{_NOW}",
+            r"(list )?(the )?(people|astronauts) (currently )?in space",
+        ],
+        ["get_people_in_space"],
+        _people_in_space_template,
+    ),
+    FastPathRoute(
+        "orbital_period",
+        [
+            # Only when the number is explicitly an altitude or a semi-major axis
+            r"(what is |what's )?(calculate |compute )?(the )?orbital period (at|for|of) (a |an )?"
+            r"(?P<value>\d+(\.\d+)?) ?km (semi-major axis|(?P<altitude>altitude)( orbit)?)",
+            r"(what is |what's )?(calculate |compute )?(the )?orbital period (at|for|of) (a |an )?"
+            r"(semi-major axis|(?P<altitude>altitude)) of (?P<value>\d+(\.\d+)?) ?km",
+        ],
+        ["calculate_orbital_period"],
+        _orbital_period_template,
+        _orbital_period_arguments,
+    ),
+    FastPathRoute(
+        "satellite_tle",
+        [r"(show |get |show me )?(the )?tle( data)?( for satellites)?"],
+        ["get_satellite_tle"],
+        _tle_template,
+    ),
+]
+
+NASA_ROUTES = [
+    FastPathRoute(
+        "apod",
+        [
+            r"(show me |what is |what's |get )?(today's |the )?(astronomy picture of the day|astronomy picture|apod)( today)?",
+        ],
+        ["nasa/apod", "nasa_apod", "apod", "get_apod"],
+        _apod_template,
+    ),
+]
+
+STAC_ROUTES = [
+    FastPathRoute(
+        "collections",
+        [
+            r"(list|show|show me|what are)( all)?( the)?( available)?( stac)? collections( available)?",
+        ],
+        ["get_collections", "list_collections", "stac/collections", "collections"],
+        _collections_template,
+    ),
+]
@@ -1,15 +1,123 @@
-from rich.console import Console
+from rich.console import Console, Group
 from rich.markdown import Markdown
 from rich.panel import Panel
 from rich.live import Live
+from rich.segment import Segment
+from rich.table import Table
 from rich.text import Text
+from perf_trace import TurnTrace, get_trace_writer
+import asyncio
 import re
+import time
+from typing import Optional
+
+
+URL_PATTERN = re.compile(r'(https?://[^\s<>"{}|\\^\[\]`]+)')
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)', re.MULTILINE)
+
+
+def make_links_clickable(text: str) -> str:
+    """Convert URLs in text to clickable Markdown links"""
+    return URL_PATTERN.sub(r'[\1](\1)', text)
+
+
+class _RenderedBlock:
+    """A completed Markdown block rendered once and replayed on every refresh"""
+
+    def __init__(self, renderable):
+        self.renderable = renderable
+        self._width = None
+        self._lines = None
+
+    def __rich_console__(self, console, options):
+        if self._width != options.max_width:
+            self._lines = console.render_lines(self.renderable, options, pad=False)
+            self._width = options.max_width
+        for line in self._lines:
+            yield from line
+            yield Segment.line()
+        # Blocks were separated by a blank line in the source text
+        yield Segment.line()
+
+
+class StreamRenderer:
+    """Incrementally renders streamed Markdown into a Live display.
+
+    Text is split into blocks at blank lines outside code fences. Completed
+    blocks are parsed and rendered once; only the trailing, still-growing
+    block is re-parsed, and at most `refresh_per_second` times.
+    """
+
+    def __init__(self, live: Live, refresh_per_second: float = 4):
+        self.live = live
+        self.min_interval = 1 / refresh_per_second
+        self.blocks = []
+        self.pending = ""
+        self._last_update = 0.0
+        # Lines of `pending` before `_scanned` have been checked; `_in_fence` is the state there
+        self._scanned = 0
+        self._in_fence = False
+
+    def feed(self, delta: str):
+        self.pending += delta
+        if "\n" in delta:
+            self._complete_blocks()
+
+        now = time.monotonic()
+        if now - self._last_update >= self.min_interval:
+            self._update(now)
+
+    def reset(self):
+        """Clear the display, e.g. when the model switches to a tool call"""
+        self.blocks = []
+        self.pending = ""
+        self._scanned = 0
+        self._in_fence = False
+        self._update(time.monotonic())
+
+    def flush(self):
+        """Render whatever is still pending"""
+        self._update(time.monotonic())
+
+    def _complete_blocks(self):
+        # Only lines completed since the last call are scanned, so long code fences stay linear
+        boundary = -1
+        start = self._scanned
+        end = self.pending.find("\n", start)
+        while end >= 0:
+            line = self.pending[start:end]
+            if FENCE_PATTERN.match(line):
+                self._in_fence = not self._in_fence
+            elif not line and not self._in_fence:
+                boundary = start - 1
+            start = end + 1
+            end = self.pending.find("\n", start)
+        self._scanned = start
+
+        if boundary > 0:
+            self.blocks.append(_RenderedBlock(self._markdown(self.pending[:boundary])))
+            self.pending = self.pending[boundary + 2:]
+            self._scanned -= boundary + 2
+
+    def _update(self, now: float):
+        self._last_update = now
+        renderables = list(self.blocks)
+        if self.pending:
+            renderables.append(self._markdown(self.pending))
+        self.live.update(Group(*renderables))
+
+    def _markdown(self, text: str):
+        try:
+            return Markdown(make_links_clickable(text))
+        except Exception:
+            return Text(text)
 
 
 class LoggingUtils:
     def __init__(self, verbose: bool = False):
         self.console = Console()
         self.verbose = verbose
+        self.trace_writer = get_trace_writer()
 
     def print_welcome(self, agent_name: str = None):
         self.console.print(Panel.fit(
@@ -55,36 +163,108 @@ class LoggingUtils:
         if self.verbose:
             self.console.print("[green]✓ Connected to MCP servers[/green]\n")
 
-    async def stream_results(self, result):
-        current_output = ""
+    def print_tool_output_stats(self, stats: dict):
+        if not self.verbose or not stats:
+            return
+
+        table = Table(title="Tool output shaping")
+        table.add_column("Tool", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Bytes in", justify="right")
+        table.add_column("Bytes out", justify="right")
+        table.add_column("Reduction", justify="right", style="green")
+
+        for tool_name, entry in sorted(stats.items()):
+            table.add_row(
+                tool_name,
+                str(entry["calls"]),
+                f"{entry['bytes_in']:,}",
+                f"{entry['bytes_out']:,}",
+                f"{entry['reduction_pct']}%",
+            )
+
+        self.console.print(table)
+
+    def print_fast_path_answer(self, answer: str, route_name: str = None):
+        if self.verbose and route_name:
+            self.console.print(
+                f"[bold blue]⚡ Answered directly via fast path:[/bold blue] [cyan]{route_name}[/cyan]")
+        self.console.print("\n" + "─" * self.console.width)
+        try:
+            self.console.print(Markdown(self._make_links_clickable(answer)))
+        except Exception:
+            self.console.print(answer)
+
+    def print_router_stats(self, stats: dict):
+        if not self.verbose or not stats.get("queries"):
+            return
+
+        routes = ", ".join(f"{name}={count}" for name, count in sorted(stats["routes"].items()))
+        self.console.print(
+            f"[dim]Fast path: {stats['hits']}/{stats['queries']} queries answered directly "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['fallbacks']} fell back to the agent)"
+            + (f" — {routes}" if routes else "") + "[/dim]")
+
+    def print_cache_stats(self, stats: dict):
+        if not self.verbose:
+            return
+
+        self.console.print(
+            f"[dim]Tool cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)[/dim]")
+
+    def print_query_timeout(self, seconds: float):
+        self.console.print("\n" + "─" * self.console.width)
+        self.console.print(Panel.fit(
+            f"[bold red]Query stopped after {seconds:g}s[/bold red]\n"
+            "[dim]Raise QUERY_DEADLINE_SECONDS to allow longer queries[/dim]",
+            border_style="red"
+        ))
+
+    def start_trace(self, agent_name: str) -> Optional[TurnTrace]:
+        """Trace for one answer when PERF_TRACE_FILE is set; pass `trace.hooks()` to the run"""
+        return TurnTrace(agent_name) if self.trace_writer else None
+
+    async def stream_results(self, result, trace: Optional[TurnTrace] = None):
+        try:
+            await self._stream_events(result, trace)
+        except asyncio.CancelledError:
+            # Stop the model and any tool calls still running in the background
+            result.cancel()
+            if trace:
+                trace.error = "cancelled"
+            raise
+        except Exception as e:
+            if trace:
+                trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if trace:
+                self.trace_writer.write(trace.to_record(result))
+
+    async def _stream_events(self, result, trace: TurnTrace = None):
         final_output = ""
         in_tool_call = False
 
-        live_console = Console()
-
-        with Live(console=live_console, refresh_per_second=4, transient=False) as live:
+        with Live(console=self.console, refresh_per_second=4, transient=False) as live:
+            renderer = StreamRenderer(live, refresh_per_second=4)
             async for event in result.stream_events():
                 if event.type == "raw_response_event":
                     if hasattr(event, 'data') and hasattr(event.data, 'delta'):
                         delta = event.data.delta
+                        if trace:
+                            trace.mark_token()
 
                         if '{"url":' in delta or '"formats":' in delta or '"onlyMainContent":' in delta:
                             continue
 
-                        current_output += delta
                         final_output += delta
-
-                        try:
-                            processed_output = self._make_links_clickable(
-                                current_output)
-                            live.update(Markdown(processed_output))
-                        except:
-                            live.update(current_output)
+                        renderer.feed(delta)
 
                 elif event.type == "run_item_stream_event":
                     if hasattr(event, 'item'):
                         if event.item.type == "tool_call_item":
-                            current_output = ""
+                            renderer.reset()
                             in_tool_call = True
 
                             if self.verbose:
@@ -122,6 +302,8 @@ class LoggingUtils:
                             f"\n[bold magenta]💬 Agent switched to:[/bold magenta] [cyan]{event.new_agent.name}[/cyan]")
                         live.start()
 
+            renderer.flush()
+
         self.console.print("\n" + "─" * self.console.width)
         try:
             processed_final = self._make_links_clickable(final_output)
@@ -131,19 +313,11 @@ class LoggingUtils:
 
     def _make_links_clickable(self, text: str) -> str:
         """Convert URLs in text to clickable links for terminals that support it"""
-        url_pattern = r'(https?://[^\s<>"{}|\\^\[\]`]+)'
-
-        def replace_url(match):
-            url = match.group(1)
-            return f"[{url}]({url})"
-
-        return re.sub(url_pattern, replace_url, text)
+        return make_links_clickable(text)
 
     def print_with_links(self, text: str):
         """Print text with clickable links using Rich's native hyperlink support"""
-        url_pattern = r'(https?://[^\s<>"{}|\\^\[\]`]+)'
-
-        parts = re.split(url_pattern, text)
+        parts = URL_PATTERN.split(text)
         rich_text = Text()
 
         for i, part in enumerate(parts):
@@ -1,6 +1,7 @@
 import asyncio
 import os
 import sys
+import threading
 try:
     import termios
     import tty
@@ -21,6 +22,8 @@ from stac_agent import STACAgent
 from orbital_agent import OrbitalAgent
 from mcp_config import MCPConfig
 from logging_utils import LoggingUtils
+from prefetch import start_prefetch
+from profiling import profile
 
 load_dotenv()
 set_tracing_disabled(True)
@@ -30,6 +33,18 @@ os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
 VERBOSE = os.getenv("VERBOSE", "false").lower() in ["true", "1", "yes"]
 
+# Token budget for per-session conversation memory (0 disables follow-up context)
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "8000"))
+
+# Answer simple single-tool queries without a model round trip
+FAST_PATH = os.getenv("FAST_PATH", "true").lower() in ["true", "1", "yes"]
+
+# Warm the tool caches in the background while waiting for the first query
+PREFETCH = os.getenv("PREFETCH", "true").lower() in ["true", "1", "yes"]
+
+# Wall-clock limit per query; outstanding model and tool calls are cancelled when it expires (0 disables)
+QUERY_DEADLINE_SECONDS = float(os.getenv("QUERY_DEADLINE_SECONDS", "120"))
+
 
 def getch():
     """Get a single character from stdin."""
@@ -127,6 +142,37 @@ def display_agent_menu(console: Console):
                 return "q"
 
 
+async def ask(prompt: str) -> str:
+    """Prompt.ask on a daemon thread, so background tasks keep running while waiting.
+    Unlike asyncio.to_thread, shutdown (e.g. Ctrl-C) never waits for the blocked input()."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(value=None, error=None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def read():
+        try:
+            value = Prompt.ask(prompt)
+        except Exception as e:
+            outcome = {"error": e}
+        else:
+            outcome = {"value": value}
+        try:
+            loop.call_soon_threadsafe(lambda: resolve(**outcome))
+        except RuntimeError:
+            # The event loop already closed
+            pass
+
+    threading.Thread(target=read, name="prompt", daemon=True).start()
+    return await future
+
+
 async def main():
     logger = LoggingUtils(verbose=VERBOSE)
     console = logger.console
@@ -158,39 +204,60 @@ async def main():
         
         async with servers[server_key] as active_server:
             logger.print_connected()
+            prefetch_task = start_prefetch(active_server, server_key) if PREFETCH else None
             
             # Create the appropriate agent based on user choice
             if choice == "1":
                 selected_agent = NASAAgent(
-                    mcp_servers=[active_server], verbose=VERBOSE)
+                    mcp_servers=[active_server], verbose=VERBOSE,
+                    memory_token_budget=SESSION_TOKEN_BUDGET, fast_path=FAST_PATH)
             elif choice == "2":
                 selected_agent = STACAgent(
-                    mcp_servers=[active_server], verbose=VERBOSE)
+                    mcp_servers=[active_server], verbose=VERBOSE,
+                    memory_token_budget=SESSION_TOKEN_BUDGET, fast_path=FAST_PATH)
             else:
                 selected_agent = OrbitalAgent(
-                    mcp_servers=[active_server], verbose=VERBOSE)
+                    mcp_servers=[active_server], verbose=VERBOSE,
+                    memory_token_budget=SESSION_TOKEN_BUDGET, fast_path=FAST_PATH)
             
-            while True:
-                user_input = Prompt.ask(
-                    f"\n[bold green]What can I help you explore today? (type 'quit' to exit)[/bold green]")
+            try:
+                while True:
+                    user_input = await ask(
+                        f"\n[bold green]What can I help you explore today? (type 'quit' to exit)[/bold green]")
 
-                if user_input.lower().strip() in ['quit', 'exit', 'q']:
-                    logger.console.print(
-                        "\n[bold yellow]Thanks for using Space Domain Agent Platform! 🚀 Goodbye! 👋[/bold yellow]")
-                    break
+                    if user_input.lower().strip() in ['quit', 'exit', 'q']:
+                        logger.console.print(
+                            "\n[bold yellow]Thanks for using Space Domain Agent Platform! 🚀 Goodbye! 👋[/bold yellow]")
+                        if mcp_config.shaper:
+                            logger.print_tool_output_stats(mcp_config.shaper.stats())
+                        if selected_agent.router:
+                            logger.print_router_stats(selected_agent.router.stats())
+                        if active_server.cache:
+                            logger.print_cache_stats(active_server.cache.stats())
+                        break
 
-                try:
-                    await selected_agent.find_answer(user_input)
-                except OutputGuardrailTripwireTriggered as e:
-                    logger.console.print("\n" + "━" * 60)
-                    logger.console.print(
-                        "⚠️  [bold red]GUARDRAIL ACTIVATED[/bold red] ⚠️", justify="center")
-                    logger.console.print("━" * 60)
-                    logger.console.print(
-                        "\n[bold red]❌ This response is not related to space domain topics.[/bold red]")
-                    logger.console.print("\n" + "━" * 60)
-                    if VERBOSE:
-                        logger.console.print(f"[dim]Debug info: {e}[/dim]")
+                    deadline = asyncio.timeout(QUERY_DEADLINE_SECONDS or None)
+                    try:
+                        with profile(f"{server_key}-query"):
+                            async with deadline:
+                                await selected_agent.find_answer(user_input)
+                    except TimeoutError:
+                        if not deadline.expired():
+                            raise
+                        logger.print_query_timeout(QUERY_DEADLINE_SECONDS)
+                    except OutputGuardrailTripwireTriggered as e:
+                        logger.console.print("\n" + "━" * 60)
+                        logger.console.print(
+                            "⚠️  [bold red]GUARDRAIL ACTIVATED[/bold red] ⚠️", justify="center")
+                        logger.console.print("━" * 60)
+                        logger.console.print(
+                            "\n[bold red]❌ This response is not related to space domain topics.[/bold red]")
+                        logger.console.print("\n" + "━" * 60)
+                        if VERBOSE:
+                            logger.console.print(f"[dim]Debug info: {e}[/dim]")
+            finally:
+                if prefetch_task and not prefetch_task.done():
+                    prefetch_task.cancel()
 
     except ValueError as e:
         console.print(f"\n[bold red]Configuration Error:[/bold red] {e}")
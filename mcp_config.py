@@ -1,6 +1,17 @@
 import os
-from agents.mcp import MCPServerSse, MCPServerStdio
+from agents.mcp import MCPServerSse
 from typing import Dict
+from mcp_middleware import MiddlewareMCPServerStdio
+from tool_cache import ToolResultCache
+from tool_output_shaper import ToolOutputShaper
+
+# Settings read by the local orbital server process
+ORBITAL_SERVER_ENV = (
+    "ISS_SAMPLE_INTERVAL", "ISS_TRACK_CAPACITY",
+    "UPSTREAM_TIMEOUT", "UPSTREAM_RATE_PER_SECOND", "UPSTREAM_BURST",
+    "BREAKER_FAILURE_THRESHOLD", "BREAKER_RESET_SECONDS",
+    "PROFILE_MODE", "PROFILE_DIR", "PROFILE_SAMPLE_INTERVAL",
+)
 
 
 class MCPConfig:
@@ -10,22 +21,72 @@ class MCPConfig:
             raise ValueError(
                 "NASA_API_KEY environment variable is not set. Get your key from https://api.nasa.gov/")
 
+        self.nasa_proxy = os.getenv("NASA_PROXY", "true").lower() in ["true", "1", "yes"]
+
         # Optional for some STAC services
         self.stac_api_key = os.getenv("STAC_API_KEY", "")
+        self.stac_proxy = os.getenv("STAC_PROXY", "true").lower() in ["true", "1", "yes"]
+
+        # Cap tool output size before it enters the model context
+        self.shaper = None
+        if os.getenv("TOOL_OUTPUT_SHAPING", "true").lower() in ["true", "1", "yes"]:
+            self.shaper = ToolOutputShaper(
+                max_bytes=int(os.getenv("TOOL_OUTPUT_MAX_BYTES", "32000")),
+                max_tokens=int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "4000")),
+            )
+
+        # Client-side cache of tool results per server, also warmed by the prefetch phase
+        self.cache_enabled = os.getenv("TOOL_CACHE", "true").lower() in ["true", "1", "yes"]
+
+        # MCP read timeout for the proxies, which fan out upstream calls within a rate budget;
+        # the other servers keep the client default. Never longer than the query deadline.
+        self.proxy_timeout = float(os.getenv("PROXY_TOOL_TIMEOUT_SECONDS", "60"))
+        query_deadline = float(os.getenv("QUERY_DEADLINE_SECONDS", "120"))
+        if query_deadline > 0:
+            self.proxy_timeout = min(self.proxy_timeout, query_deadline)
 
     def get_nasa_params(self):
+        if not self.nasa_proxy:
+            return {
+                "command": "npx",
+                "args": ["-y", "@programcomputer/nasa-mcp-server@latest"],
+                "env": {"NASA_API_KEY": self.nasa_api_key}
+            }
+
+        # Local proxy serving past APOD/NEO dates from its store and splitting long ranges
         return {
-            "command": "npx",
-            "args": ["-y", "@programcomputer/nasa-mcp-server@latest"],
-            "env": {"NASA_API_KEY": self.nasa_api_key}
+            "command": "python",
+            "args": ["nasa_proxy_server.py"],
+            "env": {
+                "NASA_API_KEY": self.nasa_api_key,
+                "NASA_UPSTREAM_COMMAND": "npx -y @programcomputer/nasa-mcp-server@latest",
+                "NASA_STORE_DIR": os.getenv("NASA_STORE_DIR", os.path.join(".cache", "nasa")),
+                "NASA_RATE_LIMIT_PER_HOUR": os.getenv(
+                    "NASA_RATE_LIMIT_PER_HOUR", "30" if self.nasa_api_key == "DEMO_KEY" else "1000"),
+                "NASA_MAX_CONCURRENCY": os.getenv("NASA_MAX_CONCURRENCY", "4"),
+                # Give up (and stop spending quota) shortly before the client stops waiting
+                "NASA_PROXY_DEADLINE_SECONDS": str(round(self.proxy_timeout * 0.9, 1)),
+            }
         }
 
     def get_stac_params(self):
+        if not self.stac_proxy:
+            return {
+                "command": "npx",
+                "args": ["-y", "stac-mcp-server@latest"],
+                "env": {
+                    "STAC_API_KEY": self.stac_api_key if self.stac_api_key else ""
+                }
+            }
+
+        # Local proxy answering repeated area-of-interest searches from its index
         return {
-            "command": "npx",
-            "args": ["-y", "stac-mcp-server@latest"],
+            "command": "python",
+            "args": ["stac_proxy_server.py"],
             "env": {
-                "STAC_API_KEY": self.stac_api_key if self.stac_api_key else ""
+                "STAC_API_KEY": self.stac_api_key if self.stac_api_key else "",
+                "STAC_UPSTREAM_COMMAND": "npx -y stac-mcp-server@latest",
+                "STAC_INDEX_MAX_BYTES": os.getenv("STAC_INDEX_MAX_BYTES", str(64 * 1024 * 1024)),
             }
         }
 
@@ -33,26 +94,39 @@ class MCPConfig:
         return {
             "command": "python",
             "args": ["orbital_mechanics_server.py"],
-            "env": {}
+            "env": {key: os.environ[key] for key in ORBITAL_SERVER_ENV if key in os.environ}
         }
 
+    def _create_cache(self):
+        return ToolResultCache() if self.cache_enabled else None
+
     async def create_servers(self):
-        nasa_server = MCPServerStdio(
+        nasa_server = MiddlewareMCPServerStdio(
             cache_tools_list=True,
             name="NASA MCP Server",
             params=self.get_nasa_params(),
+            client_session_timeout_seconds=self.proxy_timeout if self.nasa_proxy else 5,
+            shaper=self.shaper,
+            cache=self._create_cache(),
         )
 
-        stac_server = MCPServerStdio(
+        stac_server = MiddlewareMCPServerStdio(
             cache_tools_list=True,
             name="STAC MCP Server", 
             params=self.get_stac_params(),
+            client_session_timeout_seconds=self.proxy_timeout if self.stac_proxy else 5,
+            shaper=self.shaper,
+            cache=self._create_cache(),
         )
 
-        orbital_server = MCPServerStdio(
+        orbital_server = MiddlewareMCPServerStdio(
             cache_tools_list=True,
             name="Orbital Mechanics MCP Server",
             params=self.get_orbital_mechanics_params(),
+            # Longer than the server's UPSTREAM_TIMEOUT, so stale fallbacks arrive in time
+            client_session_timeout_seconds=5,
+            shaper=self.shaper,
+            cache=self._create_cache(),
         )
 
         return {
@@ -0,0 +1,30 @@
+from typing import Any, Dict, Optional
+
+from agents.mcp import MCPServerStdio
+from mcp.types import CallToolResult
+
+from tool_cache import ToolResultCache
+from tool_output_shaper import ToolOutputShaper
+
+
+class MiddlewareMCPServerStdio(MCPServerStdio):
+    """MCPServerStdio that caches tool results and shapes them before they reach the agent"""
+
+    def __init__(self, *args, shaper: Optional[ToolOutputShaper] = None,
+                 cache: Optional[ToolResultCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shaper = shaper
+        self.cache = cache
+
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]],
+                        shape: bool = True) -> CallToolResult:
+        """Call a tool through the cache; `shape=False` returns the full, unshaped result"""
+        if self.cache is not None:
+            result = await self.cache.get_or_call(
+                tool_name, arguments, lambda: super(MiddlewareMCPServerStdio, self).call_tool(tool_name, arguments))
+        else:
+            result = await super().call_tool(tool_name, arguments)
+
+        if self.shaper is None or not shape or result.isError:
+            return result
+        return self.shaper.shape_result(tool_name, result)
@@ -0,0 +1,131 @@
+"""
+Shared plumbing for the stdio MCP proxy servers
+A proxy answers the MCP handshake itself, forwards tools/list and tools/call to
+an upstream server, and lets subclasses intercept the tool calls they can serve
+better locally.
+"""
+
+import asyncio
+import json
+import sys
+from typing import Any, Dict, Optional
+
+from mcp_upstream import UpstreamError, UpstreamMCPClient
+
+
+def text_result(payload: Any, is_error: bool = False) -> Dict[str, Any]:
+    return {
+        "content": [{"type": "text", "text": json.dumps(payload)}],
+        "isError": is_error,
+    }
+
+
+def result_json(result: Dict[str, Any]) -> Optional[Any]:
+    """Decode the first text content of an upstream tool result, or None if it is not JSON"""
+    if result.get("isError"):
+        return None
+    for content in result.get("content", []):
+        if content.get("type") != "text":
+            continue
+        try:
+            return json.loads(content["text"])
+        except (json.JSONDecodeError, KeyError):
+            return None
+    return None
+
+
+class MCPProxyServer:
+    def __init__(self, name: str, upstream: UpstreamMCPClient):
+        self.name = name
+        self.version = "1.0.0"
+        self.upstream = upstream
+
+    async def initialize(self) -> Dict[str, Any]:
+        upstream_info = await self.upstream.start()
+        return {
+            "protocolVersion": upstream_info.get("protocolVersion"),
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": self.name, "version": self.version},
+        }
+
+    async def list_tools(self) -> Dict[str, Any]:
+        return await self.upstream.request("tools/list")
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.upstream.call_tool(tool_name, arguments)
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+async def handle_message(server: MCPProxyServer, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    method = request.get("method", "")
+    params = request.get("params", {}) or {}
+    request_id = request.get("id")
+
+    # Notifications (no id) need no response
+    if request_id is None:
+        return None
+
+    try:
+        if method == "initialize":
+            result = await server.initialize()
+        elif method == "tools/list":
+            result = await server.list_tools()
+        elif method == "tools/call":
+            result = await server.call_tool(params.get("name", ""), params.get("arguments", {}) or {})
+        elif method == "ping":
+            result = {}
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32601, "message": f"Method not found: {method}"}
+            }
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    except UpstreamError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32603, "message": f"Upstream error: {str(e)}"}
+        }
+    except Exception as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
+        }
+
+
+async def serve(server: MCPProxyServer):
+    """Main MCP proxy loop over stdin/stdout"""
+    write_lock = asyncio.Lock()
+    tasks = set()
+
+    async def respond(request: Dict[str, Any]):
+        response = await handle_message(server, request)
+        if response is not None:
+            async with write_lock:
+                print(json.dumps(response))
+                sys.stdout.flush()
+
+    try:
+        while True:
+            line = await asyncio.to_thread(sys.stdin.readline)
+            if not line:
+                break
+            try:
+                request = json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+
+            # Handle requests concurrently so a slow upstream call does not block others
+            task = asyncio.create_task(respond(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await server.upstream.close()
+        print(json.dumps({"proxy": server.name, "stats": server.stats()}), file=sys.stderr)
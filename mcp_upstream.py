@@ -0,0 +1,122 @@
+"""
+Minimal stdio JSON-RPC client used by the proxy servers to talk to an upstream MCP server
+"""
+
+import asyncio
+import json
+import shlex
+import sys
+from typing import Any, Dict, List, Optional
+
+PROTOCOL_VERSION = "2024-11-05"
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream server returns a JSON-RPC error or goes away"""
+
+
+class UpstreamMCPClient:
+    def __init__(self, command: List[str], env: Optional[Dict[str, str]] = None,
+                 client_name: str = "proxy"):
+        self.command = command
+        self.env = env
+        self.client_name = client_name
+        self.initialize_result: Optional[Dict[str, Any]] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._start_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @classmethod
+    def from_command_line(cls, command_line: str, **kwargs) -> "UpstreamMCPClient":
+        return cls(shlex.split(command_line), **kwargs)
+
+    async def start(self) -> Dict[str, Any]:
+        """Spawn the upstream server and run the MCP initialize handshake once"""
+        async with self._start_lock:
+            if self.initialize_result is not None:
+                return self.initialize_result
+
+            self._process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=sys.stderr,
+                env=self.env,
+                limit=64 * 1024 * 1024,
+            )
+            self._reader = asyncio.create_task(self._read_loop())
+
+            self.initialize_result = await self._request("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": self.client_name, "version": "1.0.0"},
+            })
+            await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            return self.initialize_result
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self.start()
+        return await self._request(method, params or {})
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        result = await self.request("tools/list")
+        return result.get("tools", [])
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self._process.kill()
+
+    async def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _send(self, message: Dict[str, Any]):
+        if self._process is None or self._process.stdin is None:
+            raise UpstreamError("Upstream server is not running")
+        async with self._write_lock:
+            self._process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+            await self._process.stdin.drain()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                # Ignore upstream notifications and requests; only responses are awaited
+                future = self._pending.get(message.get("id"))
+                if future is None or future.done() or "method" in message:
+                    continue
+                if "error" in message:
+                    error = message["error"]
+                    future.set_exception(UpstreamError(error.get("message", str(error))))
+                else:
+                    future.set_result(message.get("result", {}))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(UpstreamError("Upstream server exited"))
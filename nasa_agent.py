@@ -1,14 +1,19 @@
 from agents import Agent, Runner
 from agents.mcp import MCPServerStdio
+from fast_path_router import FastPathRouter, NASA_ROUTES
 from logging_utils import LoggingUtils
+from session_memory import SessionMemory
 from typing import List
 
 
 class NASAAgent:
-    def __init__(self, mcp_servers: List[MCPServerStdio], verbose: bool = False):
+    def __init__(self, mcp_servers: List[MCPServerStdio], verbose: bool = False,
+                 memory_token_budget: int = 8000, fast_path: bool = True):
         self.mcp_servers = mcp_servers
         self.verbose = verbose
         self.logger = LoggingUtils(verbose)
+        self.memory = SessionMemory(token_budget=memory_token_budget)
+        self.router = FastPathRouter(NASA_ROUTES, mcp_servers) if fast_path else None
 
         self.agent = Agent(
             name="NASA Space Data Assistant",
@@ -41,14 +46,26 @@ class NASAAgent:
         )
 
     async def find_answer(self, user_input: str):
+        if self.router:
+            routed = await self.router.try_answer(user_input)
+            if routed:
+                route_name, answer = routed
+                self.logger.print_fast_path_answer(answer, route_name)
+                self.memory.record_turn(user_input, [{"role": "assistant", "content": answer}])
+                self.logger.print_complete()
+                return
+
         prompt = f"""User query: {user_input}
         
         Please help the user explore NASA's space data. Use the appropriate NASA tools to provide comprehensive, scientifically accurate information. Include images, data, and context when relevant."""
 
         self.logger.print_searching("NASA Space Data Assistant")
 
+        trace = self.logger.start_trace(self.agent.name)
         result = Runner.run_streamed(
-            starting_agent=self.agent, input=prompt, max_turns=10)
+            starting_agent=self.agent, input=self.memory.build_input(prompt), max_turns=10,
+            hooks=trace.hooks() if trace else None)
 
-        await self.logger.stream_results(result)
+        await self.logger.stream_results(result, trace)
+        self.memory.record_run(user_input, result.to_input_list())
         self.logger.print_complete() 
\ No newline at end of file
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+NASA Proxy MCP Server
+Fronts the upstream NASA MCP server, serves past APOD entries and NEO feed days
+from a local content-addressed store, and fans long date ranges out into
+window-sized upstream calls made concurrently within the API key's rate budget
+"""
+
+import asyncio
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from content_store import ContentStore
+from mcp_proxy import MCPProxyServer, result_json, serve, text_result
+from mcp_upstream import UpstreamMCPClient
+from resilience import TokenBucket
+
+DEFAULT_UPSTREAM_COMMAND = "npx -y @programcomputer/nasa-mcp-server@latest"
+
+APOD_TOOLS = {"apod"}
+NEO_FEED_TOOLS = {"neo", "neo_feed", "neows", "neows_feed", "asteroids"}
+
+# NeoWs rejects feed requests spanning more than seven days
+NEO_WINDOW_DAYS = 7
+# APOD ranges have no such limit, but smaller chunks can be fetched in parallel
+APOD_WINDOW_DAYS = 31
+
+
+class RateBudgetExceeded(Exception):
+    """The rate limiter cannot admit the needed upstream calls before the deadline"""
+
+
+class _ChunkFailed(Exception):
+    """An upstream chunk returned an error or a shape the proxy cannot split into days.
+    `result` is the answer to give the client instead, if any."""
+
+    def __init__(self, result: Optional[Dict[str, Any]], unparseable: bool):
+        super().__init__("upstream chunk failed")
+        self.result = result
+        self.unparseable = unparseable
+
+
+def tool_kind(tool_name: str) -> str:
+    """Normalize 'nasa/apod', 'nasa_apod', 'get-apod' etc. to 'apod'"""
+    name = tool_name.lower().replace("-", "_")
+    for prefix in ("nasa/", "nasa_", "get_"):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name
+
+
+def parse_date(value: str) -> date:
+    return date.fromisoformat(str(value)[:10])
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def date_chunks(days: List[date], window_days: int) -> List[List[date]]:
+    """Group sorted days into runs of consecutive days spanning at most `window_days`"""
+    chunks: List[List[date]] = []
+    for day in days:
+        if (chunks and day - chunks[-1][-1] == timedelta(days=1)
+                and day - chunks[-1][0] <= timedelta(days=window_days)):
+            chunks[-1].append(day)
+        else:
+            chunks.append([day])
+    return chunks
+
+
+class NASAProxyServer(MCPProxyServer):
+    def __init__(self, upstream: UpstreamMCPClient, store: ContentStore,
+                 rate_limiter: TokenBucket, max_concurrency: int = 4,
+                 deadline: Optional[float] = None):
+        super().__init__("NASA Proxy MCP Server", upstream)
+        self.store = store
+        self.rate_limiter = rate_limiter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Seconds a tool call may take; the client has stopped waiting after that
+        self.deadline = deadline
+        # Tools whose output could not be split into days; passed straight through
+        self.unparseable_tools = set()
+        self.counters = {"upstream_calls": 0, "served_from_store": 0, "passthrough": 0,
+                         "rejected": 0, "timed_out": 0}
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(self._call_tool(tool_name, arguments), self.deadline)
+        except RateBudgetExceeded as e:
+            self.counters["rejected"] += 1
+            return text_result({"error": str(e)}, is_error=True)
+        except asyncio.TimeoutError:
+            # Outstanding chunk calls are cancelled before they spend more quota
+            self.counters["timed_out"] += 1
+            return text_result(
+                {"error": f"NASA request did not finish within {self.deadline:g}s"}, is_error=True)
+
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        kind = tool_kind(tool_name)
+        result = None
+        if tool_name not in self.unparseable_tools:
+            try:
+                if kind in APOD_TOOLS:
+                    result = await self.apod(tool_name, arguments)
+                elif kind in NEO_FEED_TOOLS and arguments.get("start_date"):
+                    result = await self.neo_feed(tool_name, arguments)
+            except _ChunkFailed as e:
+                if e.unparseable:
+                    self.unparseable_tools.add(tool_name)
+                if e.result is not None:
+                    self.counters["passthrough"] += 1
+                    return e.result
+
+        if result is None:
+            self.counters["passthrough"] += 1
+            self._check_rate_budget(1)
+            return await self._upstream_call(tool_name, arguments)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, store=self.store.stats(),
+                    unparseable_tools=sorted(self.unparseable_tools))
+
+    async def apod(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Serve APOD for a past date or date range; None leaves the call to upstream"""
+        if arguments.get("count"):
+            # Random picks are not addressable by date
+            return None
+
+        today = utc_today()
+        if arguments.get("start_date"):
+            start = parse_date(arguments["start_date"])
+            end = parse_date(arguments["end_date"]) if arguments.get("end_date") else today
+            if end < start:
+                # Let the upstream reject the range instead of answering with no pictures
+                return None
+            days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        elif arguments.get("date"):
+            days = [parse_date(arguments["date"])]
+        else:
+            # Today's picture can still change; the client cache covers it
+            return None
+
+        extra = {key: value for key, value in arguments.items()
+                 if key not in ("date", "start_date", "end_date")}
+        entries = await self._fetch_days(
+            "apod", tool_name, extra, days, APOD_WINDOW_DAYS, today, self._apod_entries)
+        found = [entries[day] for day in days if entries.get(day) is not None]
+        if "start_date" not in arguments:
+            return text_result(found[0]) if found else None
+        return text_result(found)
+
+    async def neo_feed(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Serve a NEO feed of any length by merging stored days and concurrent window-sized fetches"""
+        today = utc_today()
+        start = parse_date(arguments["start_date"])
+        if arguments.get("end_date"):
+            end = parse_date(arguments["end_date"])
+        else:
+            end = start + timedelta(days=NEO_WINDOW_DAYS)
+        if end < start:
+            return None
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+        extra = {key: value for key, value in arguments.items()
+                 if key not in ("start_date", "end_date")}
+        entries = await self._fetch_days(
+            "neo_feed", tool_name, extra, days, NEO_WINDOW_DAYS, today, self._neo_entries)
+        near_earth_objects = {day.isoformat(): entries.get(day) or [] for day in days}
+        return text_result({
+            "element_count": sum(len(objects) for objects in near_earth_objects.values()),
+            "near_earth_objects": near_earth_objects,
+        })
+
+    async def _fetch_days(self, kind: str, tool_name: str, extra: Dict[str, Any],
+                          days: List[date], window_days: int, today: date,
+                          parse) -> Dict[date, Any]:
+        """Collect per-day payloads from the store, fetching missing days upstream in parallel"""
+        entries: Dict[date, Any] = {}
+        missing = []
+        for day in days:
+            stored = self.store.get(self._key(kind, day, extra)) if day < today else None
+            if stored is not None:
+                entries[day] = stored
+                self.counters["served_from_store"] += 1
+            else:
+                missing.append(day)
+
+        chunks = date_chunks(missing, window_days)
+        self._check_rate_budget(len(chunks))
+        results = await asyncio.gather(
+            *(self._fetch_chunk(tool_name, extra, chunk, kind) for chunk in chunks))
+
+        for chunk, result in zip(chunks, results):
+            if result.get("isError"):
+                # Bad dates, quota and the like apply to the whole query
+                raise _ChunkFailed(result, unparseable=False)
+            fetched = parse(result, chunk)
+            if fetched is None:
+                # A single chunk spanning every requested day is the answer to the whole query
+                whole = len(chunks) == 1 and len(chunk) == len(days)
+                raise _ChunkFailed(result if whole else None, unparseable=True)
+            for day, payload in fetched.items():
+                entries[day] = payload
+                # Only past days are immutable; today's and future data may still change
+                if day < today:
+                    self.store.put(self._key(kind, day, extra), payload)
+        return entries
+
+    async def _fetch_chunk(self, tool_name: str, extra: Dict[str, Any],
+                           chunk: List[date], kind: str) -> Dict[str, Any]:
+        arguments = dict(extra)
+        if kind == "apod" and len(chunk) == 1:
+            arguments["date"] = chunk[0].isoformat()
+        else:
+            arguments["start_date"] = chunk[0].isoformat()
+            arguments["end_date"] = chunk[-1].isoformat()
+        return await self._upstream_call(tool_name, arguments)
+
+    def _check_rate_budget(self, calls: int):
+        """Fail fast when the rate limiter cannot admit `calls` calls before the deadline"""
+        if self.deadline is None:
+            return
+        wait = self.rate_limiter.estimated_wait(calls)
+        if wait > self.deadline:
+            raise RateBudgetExceeded(
+                f"This needs {calls} NASA API call(s), about {wait:.0f}s into the rate limit, "
+                f"longer than the {self.deadline:g}s request timeout; "
+                "request a shorter date range or try again later")
+
+    async def _upstream_call(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            self.counters["upstream_calls"] += 1
+            return await self.upstream.call_tool(tool_name, arguments)
+
+    def _apod_entries(self, result: Dict[str, Any], chunk: List[date]) -> Optional[Dict[date, Any]]:
+        data = result_json(result)
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            return None
+        entries = {}
+        for entry in data:
+            if isinstance(entry, dict) and entry.get("date"):
+                entries[parse_date(entry["date"])] = entry
+        return entries
+
+    def _neo_entries(self, result: Dict[str, Any], chunk: List[date]) -> Optional[Dict[date, Any]]:
+        data = result_json(result)
+        if not isinstance(data, dict) or not isinstance(data.get("near_earth_objects"), dict):
+            return None
+        # Days without approaches are absent from the feed but still known to be empty
+        entries: Dict[date, Any] = {day: [] for day in chunk}
+        for day, objects in data["near_earth_objects"].items():
+            entries[parse_date(day)] = objects
+        return entries
+
+    def _key(self, kind: str, day: date, extra: Dict[str, Any]) -> str:
+        return f"{kind}:{day.isoformat()}:{json.dumps(extra, sort_keys=True)}"
+
+
+async def main():
+    api_key = os.getenv("NASA_API_KEY", "DEMO_KEY")
+    default_rate = "30" if api_key == "DEMO_KEY" else "1000"
+    requests_per_hour = float(os.getenv("NASA_RATE_LIMIT_PER_HOUR", default_rate))
+
+    upstream = UpstreamMCPClient.from_command_line(
+        os.getenv("NASA_UPSTREAM_COMMAND", DEFAULT_UPSTREAM_COMMAND),
+        env=dict(os.environ), client_name="nasa-proxy")
+    store = ContentStore(os.getenv("NASA_STORE_DIR", os.path.join(".cache", "nasa")))
+    rate_limiter = TokenBucket(rate=requests_per_hour / 3600, capacity=max(1.0, min(10.0, requests_per_hour)))
+    max_concurrency = int(os.getenv("NASA_MAX_CONCURRENCY", "4"))
+    deadline = float(os.getenv("NASA_PROXY_DEADLINE_SECONDS", "0")) or None
+
+    await serve(NASAProxyServer(upstream, store, rate_limiter, max_concurrency, deadline))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,19 @@
 from agents import Agent, Runner
 from agents.mcp import MCPServerStdio
+from fast_path_router import FastPathRouter, ORBITAL_ROUTES
 from logging_utils import LoggingUtils
+from session_memory import SessionMemory
 from typing import List
 
 
 class OrbitalAgent:
-    def __init__(self, mcp_servers: List[MCPServerStdio], verbose: bool = False):
+    def __init__(self, mcp_servers: List[MCPServerStdio], verbose: bool = False,
+                 memory_token_budget: int = 8000, fast_path: bool = True):
         self.mcp_servers = mcp_servers
         self.verbose = verbose
         self.logger = LoggingUtils(verbose)
+        self.memory = SessionMemory(token_budget=memory_token_budget)
+        self.router = FastPathRouter(ORBITAL_ROUTES, mcp_servers) if fast_path else None
 
         self.agent = Agent(
             name="Orbital Mechanics Assistant",
@@ -23,6 +28,7 @@ class OrbitalAgent:
 
             Available orbital mechanics tools:
             - get_iss_position: Get current ISS coordinates
+            - iss_track: Get where the ISS has been over the last N minutes (ground track)
             - get_people_in_space: List current space crew members
             - get_iss_pass_times: Calculate ISS visibility for a location
             - get_satellite_tle: Get Two-Line Element data for satellites
@@ -51,14 +57,26 @@ class OrbitalAgent:
         )
 
     async def find_answer(self, user_input: str):
+        if self.router:
+            routed = await self.router.try_answer(user_input)
+            if routed:
+                route_name, answer = routed
+                self.logger.print_fast_path_answer(answer, route_name)
+                self.memory.record_turn(user_input, [{"role": "assistant", "content": answer}])
+                self.logger.print_complete()
+                return
+
         prompt = f"""User query: {user_input}
         
         Please help the user with orbital mechanics, satellite tracking, or space station information. Use the appropriate orbital tools and provide clear explanations of the orbital mechanics involved."""
 
         self.logger.print_searching("Orbital Mechanics Assistant")
 
+        trace = self.logger.start_trace(self.agent.name)
         result = Runner.run_streamed(
-            starting_agent=self.agent, input=prompt, max_turns=10)
+            starting_agent=self.agent, input=self.memory.build_input(prompt), max_turns=10,
+            hooks=trace.hooks() if trace else None)
 
-        await self.logger.stream_results(result)
+        await self.logger.stream_results(result, trace)
+        self.memory.record_run(user_input, result.to_input_list())
         self.logger.print_complete() 
\ No newline at end of file
@@ -6,63 +6,258 @@ Provides satellite tracking, ISS position, and orbital mechanics data
 
 import asyncio
 import json
+import os
 import sys
+import time
+from array import array
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 import httpx
 
+from profiling import profile
+from resilience import CircuitBreaker, CircuitOpenError, SingleFlight, TokenBucket
+
+# Seconds upstream results are reused before fetching again
+ISS_POSITION_TTL = 5
+PEOPLE_IN_SPACE_TTL = 600
+ISS_PASS_TIMES_TTL = 300
+
+# Background ISS sampling cadence in seconds (0 disables) and number of samples kept
+ISS_SAMPLE_INTERVAL = float(os.getenv("ISS_SAMPLE_INTERVAL", "5"))
+ISS_TRACK_CAPACITY = int(os.getenv("ISS_TRACK_CAPACITY", "720"))
+
+# Upstream protection: per-call deadline, per-host rate limit and circuit breaker.
+# The deadline must stay well under the client's 5 s MCP read timeout so a slow
+# upstream still leaves time to answer with the last good value.
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "2"))
+UPSTREAM_RATE_PER_SECOND = float(os.getenv("UPSTREAM_RATE_PER_SECOND", "2"))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", "5"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+
+class ISSPositionBuffer:
+    """Fixed-size ring buffer of ISS samples backed by flat float arrays"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0]) * capacity
+        self.latitudes = array("d", [0.0]) * capacity
+        self.longitudes = array("d", [0.0]) * capacity
+        self.count = 0
+        self._next = 0
+
+    def append(self, timestamp: float, latitude: float, longitude: float):
+        self.timestamps[self._next] = timestamp
+        self.latitudes[self._next] = latitude
+        self.longitudes[self._next] = longitude
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, float, float]]:
+        if not self.count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return self.timestamps[i], self.latitudes[i], self.longitudes[i]
+
+    def since(self, cutoff: float) -> List[Tuple[float, float, float]]:
+        """Samples newer than `cutoff`, oldest first"""
+        samples = []
+        for offset in range(1, self.count + 1):
+            i = (self._next - offset) % self.capacity
+            if self.timestamps[i] < cutoff:
+                break
+            samples.append((self.timestamps[i], self.latitudes[i], self.longitudes[i]))
+        samples.reverse()
+        return samples
+
 
 class OrbitalMechanicsServer:
-    def __init__(self):
+    def __init__(self, sample_interval: float = ISS_SAMPLE_INTERVAL,
+                 track_capacity: int = ISS_TRACK_CAPACITY):
         self.name = "Orbital Mechanics MCP Server"
         self.version = "1.0.0"
-        
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.sample_interval = sample_interval
+        self.iss_samples = ISSPositionBuffer(track_capacity)
+        self._sampler: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._single_flight = SingleFlight()
+        self._rate_limiters: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._last_good: Dict[str, Tuple[float, Any]] = {}
+
+    def start_sampler(self):
+        """Poll the ISS position on a fixed cadence into the ring buffer"""
+        if self.sample_interval > 0 and self._sampler is None:
+            self._sampler = asyncio.create_task(self._sample_iss_position())
+
+    async def _sample_iss_position(self):
+        while True:
+            started = time.monotonic()
+            result = await self._fetch_iss_position()
+            if result.get("success") and not result.get("stale"):
+                self.iss_samples.append(
+                    float(result.get("timestamp") or time.time()), result["latitude"], result["longitude"])
+            await asyncio.sleep(max(0.0, self.sample_interval - (time.monotonic() - started)))
+
+    async def _cached(self, key: str, ttl: float,
+                      fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Serve a successful result from the cache while it is fresh"""
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        result = await fetch()
+        if result.get("success") and not result.get("stale"):
+            self._cache[key] = (time.monotonic() + ttl, result)
+        return result
+
+    async def close(self):
+        if self._sampler is not None:
+            self._sampler.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _get_json(self, url: str) -> Tuple[Any, Optional[float]]:
+        """GET an upstream JSON document, returning (data, age_seconds).
+
+        Identical in-flight requests share one call. When the upstream fails or its
+        circuit is open, the last good response is served with its age instead.
+        """
+        try:
+            return await self._single_flight.run(url, lambda: self._guarded_get(url)), None
+        except Exception:
+            last_good = self._last_good.get(url)
+            if last_good is None:
+                raise
+            fetched_at, data = last_good
+            return data, time.time() - fetched_at
+
+    async def _guarded_get(self, url: str) -> Any:
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} is unavailable after repeated failures; retrying later")
+
+        try:
+            # The deadline covers waiting for a rate-limit token as well as the request
+            data = await asyncio.wait_for(self._rate_limited_get(host, url), UPSTREAM_TIMEOUT)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise asyncio.TimeoutError(f"{host} did not respond within {UPSTREAM_TIMEOUT:g}s") from None
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        self._last_good[url] = (time.time(), data)
+        return data
+
+    async def _rate_limited_get(self, host: str, url: str) -> Any:
+        rate_limiter = self._rate_limiters.get(host)
+        if rate_limiter is None:
+            rate_limiter = self._rate_limiters[host] = TokenBucket(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST)
+        await rate_limiter.acquire()
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT)
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    def _mark_stale(self, result: Dict[str, Any], age: Optional[float]) -> Dict[str, Any]:
+        if age is not None:
+            result["stale"] = True
+            result["data_age_seconds"] = round(age, 1)
+        return result
+
     async def get_iss_position(self) -> Dict[str, Any]:
         """Get current ISS position"""
+        latest = self.iss_samples.latest()
+        # Serve the sampler's latest position while it is within two sampling periods
+        if latest and time.time() - latest[0] <= 2 * self.sample_interval:
+            timestamp, latitude, longitude = latest
+            return {
+                "success": True,
+                "timestamp": int(timestamp),
+                "latitude": latitude,
+                "longitude": longitude,
+                "message": "success"
+            }
+        return await self._cached("iss_position", ISS_POSITION_TTL, self._fetch_iss_position)
+
+    async def get_iss_track(self, minutes: float = 10, max_points: int = 60) -> Dict[str, Any]:
+        """Get recent ISS ground track from the sampled positions"""
+        if self.sample_interval <= 0:
+            return {"success": False, "error": "ISS sampling is disabled (ISS_SAMPLE_INTERVAL=0)"}
+
+        samples = self.iss_samples.since(time.time() - minutes * 60)
+        # Thin long tracks evenly, always keeping the newest sample
+        if max_points > 0 and len(samples) > max_points:
+            step = len(samples) / max_points
+            samples = [samples[int(len(samples) - 1 - i * step)] for i in range(max_points)][::-1]
+
+        return {
+            "success": True,
+            "minutes": minutes,
+            "sample_interval_seconds": self.sample_interval,
+            "count": len(samples),
+            "samples": [
+                {"timestamp": int(timestamp), "latitude": latitude, "longitude": longitude}
+                for timestamp, latitude, longitude in samples
+            ]
+        }
+
+    async def _fetch_iss_position(self) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get("http://api.open-notify.org/iss-now.json")
-                data = response.json()
-                
-                return {
-                    "success": True,
-                    "timestamp": data.get("timestamp"),
-                    "latitude": float(data["iss_position"]["latitude"]),
-                    "longitude": float(data["iss_position"]["longitude"]),
-                    "message": data.get("message", "success")
-                }
+            data, age = await self._get_json("http://api.open-notify.org/iss-now.json")
+            return self._mark_stale({
+                "success": True,
+                "timestamp": data.get("timestamp"),
+                "latitude": float(data["iss_position"]["latitude"]),
+                "longitude": float(data["iss_position"]["longitude"]),
+                "message": data.get("message", "success")
+            }, age)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def get_people_in_space(self) -> Dict[str, Any]:
         """Get list of people currently in space"""
+        return await self._cached("people_in_space", PEOPLE_IN_SPACE_TTL, self._fetch_people_in_space)
+
+    async def _fetch_people_in_space(self) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get("http://api.open-notify.org/astros.json")
-                data = response.json()
-                
-                return {
-                    "success": True,
-                    "number": data.get("number", 0),
-                    "people": data.get("people", []),
-                    "message": data.get("message", "success")
-                }
+            data, age = await self._get_json("http://api.open-notify.org/astros.json")
+            return self._mark_stale({
+                "success": True,
+                "number": data.get("number", 0),
+                "people": data.get("people", []),
+                "message": data.get("message", "success")
+            }, age)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def get_iss_pass_times(self, lat: float, lon: float, alt: float = 0) -> Dict[str, Any]:
         """Get ISS pass times for a given location"""
+        return await self._cached(
+            f"iss_pass_times:{lat:.2f}:{lon:.2f}:{alt:.0f}", ISS_PASS_TIMES_TTL,
+            lambda: self._fetch_iss_pass_times(lat, lon, alt))
+
+    async def _fetch_iss_pass_times(self, lat: float, lon: float, alt: float) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"http://api.open-notify.org/iss-pass.json?lat={lat}&lon={lon}&alt={alt}"
-                response = await client.get(url)
-                data = response.json()
-                
-                return {
-                    "success": True,
-                    "passes": data.get("response", []),
-                    "message": data.get("message", "success")
-                }
+            url = f"http://api.open-notify.org/iss-pass.json?lat={lat}&lon={lon}&alt={alt}"
+            data, age = await self._get_json(url)
+            return self._mark_stale({
+                "success": True,
+                "passes": data.get("response", []),
+                "message": data.get("message", "success")
+            }, age)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -125,6 +320,11 @@ class OrbitalMechanicsServer:
             if method == "orbital/iss_position":
                 return await self.get_iss_position()
             
+            elif method == "orbital/iss_track":
+                minutes = float(params.get("minutes", 10))
+                max_points = int(params.get("max_points", 60))
+                return await self.get_iss_track(minutes, max_points)
+
             elif method == "orbital/people_in_space":
                 return await self.get_people_in_space()
             
@@ -155,160 +355,194 @@ class OrbitalMechanicsServer:
             return {"success": False, "error": f"Request handling error: {str(e)}"}
 
 
-async def main():
-    """Main MCP server loop"""
-    server = OrbitalMechanicsServer()
-    
-    # MCP protocol implementation
-    while True:
-        try:
-            line = sys.stdin.readline()
-            if not line:
-                break
-                
-            request = json.loads(line.strip())
-            method = request.get("method", "")
-            params = request.get("params", {})
-            request_id = request.get("id")
-            
-            if method == "initialize":
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "protocolVersion": "1.0.0",
-                        "capabilities": {
-                            "tools": {}
-                        },
-                        "serverInfo": {
-                            "name": server.name,
-                            "version": server.version
-                        }
-                    }
+async def handle_message(server: OrbitalMechanicsServer, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the JSON-RPC response for one request"""
+    method = request.get("method", "")
+    params = request.get("params", {})
+    request_id = request.get("id")
+
+    if method == "initialize":
+        response = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "protocolVersion": "1.0.0",
+                "capabilities": {
+                    "tools": {}
+                },
+                "serverInfo": {
+                    "name": server.name,
+                    "version": server.version
                 }
-            
-            elif method == "tools/list":
-                response = {
-                    "jsonrpc": "2.0", 
-                    "id": request_id,
-                    "result": {
-                        "tools": [
-                            {
-                                "name": "get_iss_position",
-                                "description": "Get current position of the International Space Station",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {}
-                                }
-                            },
-                            {
-                                "name": "get_people_in_space", 
-                                "description": "Get list of people currently in space",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {}
-                                }
-                            },
-                            {
-                                "name": "get_iss_pass_times",
-                                "description": "Get ISS pass times for a location",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "latitude": {"type": "number"},
-                                        "longitude": {"type": "number"},
-                                        "altitude": {"type": "number"}
-                                    },
-                                    "required": ["latitude", "longitude"]
-                                }
+            }
+        }
+
+    elif method == "tools/list":
+        response = {
+            "jsonrpc": "2.0", 
+            "id": request_id,
+            "result": {
+                "tools": [
+                    {
+                        "name": "get_iss_position",
+                        "description": "Get current position of the International Space Station",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {}
+                        }
+                    },
+                    {
+                        "name": "iss_track",
+                        "description": "Get the ISS ground track over the last N minutes from recorded positions",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "minutes": {"type": "number"},
+                                "max_points": {"type": "integer"}
+                            }
+                        }
+                    },
+                    {
+                        "name": "get_people_in_space", 
+                        "description": "Get list of people currently in space",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {}
+                        }
+                    },
+                    {
+                        "name": "get_iss_pass_times",
+                        "description": "Get ISS pass times for a location",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {
+                                "latitude": {"type": "number"},
+                                "longitude": {"type": "number"},
+                                "altitude": {"type": "number"}
                             },
-                            {
-                                "name": "get_satellite_tle",
-                                "description": "Get Two-Line Element data for satellites",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {}
-                                }
+                            "required": ["latitude", "longitude"]
+                        }
+                    },
+                    {
+                        "name": "get_satellite_tle",
+                        "description": "Get Two-Line Element data for satellites",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {}
+                        }
+                    },
+                    {
+                        "name": "calculate_orbital_period",
+                        "description": "Calculate orbital period from semi-major axis",
+                        "inputSchema": {
+                            "type": "object", 
+                            "properties": {
+                                "semi_major_axis": {"type": "number"}
                             },
-                            {
-                                "name": "calculate_orbital_period",
-                                "description": "Calculate orbital period from semi-major axis",
-                                "inputSchema": {
-                                    "type": "object", 
-                                    "properties": {
-                                        "semi_major_axis": {"type": "number"}
-                                    },
-                                    "required": ["semi_major_axis"]
-                                }
-                            }
-                        ]
-                    }
-                }
-            
-            elif method == "tools/call":
-                tool_name = params.get("name", "")
-                tool_params = params.get("arguments", {})
-                
-                # Map tool names to internal methods
-                method_map = {
-                    "get_iss_position": "orbital/iss_position",
-                    "get_people_in_space": "orbital/people_in_space", 
-                    "get_iss_pass_times": "orbital/iss_pass_times",
-                    "get_satellite_tle": "orbital/satellite_tle",
-                    "calculate_orbital_period": "orbital/calculate_period"
-                }
-                
-                if tool_name in method_map:
-                    result = await server.handle_request(method_map[tool_name], tool_params)
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": json.dumps(result, indent=2)
-                                }
-                            ]
+                            "required": ["semi_major_axis"]
                         }
                     }
-                else:
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Unknown tool: {tool_name}"
+                ]
+            }
+        }
+
+    elif method == "tools/call":
+        tool_name = params.get("name", "")
+        tool_params = params.get("arguments", {})
+
+        # Map tool names to internal methods
+        method_map = {
+            "get_iss_position": "orbital/iss_position",
+            "iss_track": "orbital/iss_track",
+            "get_people_in_space": "orbital/people_in_space", 
+            "get_iss_pass_times": "orbital/iss_pass_times",
+            "get_satellite_tle": "orbital/satellite_tle",
+            "calculate_orbital_period": "orbital/calculate_period"
+        }
+
+        if tool_name in method_map:
+            result = await server.handle_request(method_map[tool_name], tool_params)
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": json.dumps(result, indent=2)
                         }
-                    }
-            
-            else:
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Method not found: {method}"
-                    }
+                    ]
                 }
-            
-            print(json.dumps(response))
-            sys.stdout.flush()
-            
-        except json.JSONDecodeError:
-            continue
+            }
+        else:
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32601,
+                    "message": f"Unknown tool: {tool_name}"
+                }
+            }
+
+    else:
+        response = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32601,
+                "message": f"Method not found: {method}"
+            }
+        }
+
+    return response
+
+
+async def main():
+    """Main MCP server loop"""
+    server = OrbitalMechanicsServer()
+    server.start_sampler()
+    write_lock = asyncio.Lock()
+    pending = set()
+
+    async def respond(request: Dict[str, Any]):
+        label = (request.get("params") or {}).get("name") or request.get("method") or "request"
+        try:
+            with profile(f"orbital-{label}"):
+                response = await handle_message(server, request)
         except Exception as e:
-            error_response = {
+            response = {
                 "jsonrpc": "2.0", 
-                "id": request.get("id") if 'request' in locals() else None,
+                "id": request.get("id"),
                 "error": {
                     "code": -32603,
                     "message": f"Internal error: {str(e)}"
                 }
             }
-            print(json.dumps(error_response))
+        async with write_lock:
+            print(json.dumps(response))
             sys.stdout.flush()
 
+    # MCP protocol implementation
+    while True:
+        # Read in a worker thread so the background sampler keeps running
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break
+
+        try:
+            request = json.loads(line.strip())
+        except json.JSONDecodeError:
+            continue
+
+        # Requests are answered concurrently so identical upstream calls can be coalesced
+        task = asyncio.create_task(respond(request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.wait(pending)
+    await server.close()
+
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Per-turn performance tracing
+Records time-to-first-token, tool latency and token usage to a rotating JSONL file,
+and aggregates the trace into per-agent and per-tool percentiles:
+
+    python perf_trace.py [trace_file]
+"""
+
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from agents import RunHooks
+
+
+class TurnTrace:
+    """Timing and usage collected while streaming one agent answer"""
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.tools: List[Dict[str, Any]] = []
+        # Start times of running tools by name, oldest first
+        self._pending_tools: Dict[str, List[float]] = {}
+        self.error: Optional[str] = None
+
+    def mark_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def hooks(self) -> RunHooks:
+        """Run hooks timing each tool where it actually runs.
+
+        Tool stream events are only queued once every tool of the step has finished,
+        so they cannot measure tool latency.
+        """
+        return TraceRunHooks(self)
+
+    def tool_started(self, tool_name: str):
+        self._pending_tools.setdefault(tool_name, []).append(time.perf_counter())
+
+    def tool_finished(self, tool_name: str):
+        # Hooks carry no call id; concurrent calls of one tool are paired first in, first out
+        started = self._pending_tools.get(tool_name)
+        if started:
+            elapsed = time.perf_counter() - started.pop(0)
+            self.tools.append({"name": tool_name, "ms": round(elapsed * 1000, 1)})
+
+    def to_record(self, result) -> Dict[str, Any]:
+        ended = time.perf_counter()
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "agent": self.agent_name,
+            "ttft_ms": self._ms(self.first_token) if self.first_token else None,
+            "total_ms": self._ms(ended),
+            "turns": getattr(result, "current_turn", None),
+            "max_turns": getattr(result, "max_turns", None),
+            "tools": self.tools + [
+                {"name": name, "ms": None, "unfinished": True}
+                for name, started in self._pending_tools.items() for _ in started
+            ],
+            "usage": self._usage(result),
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+    def _ms(self, timestamp: float) -> float:
+        return round((timestamp - self.started) * 1000, 1)
+
+    def _usage(self, result) -> Optional[Dict[str, int]]:
+        usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+        if usage is None:
+            return None
+        return {
+            "requests": usage.requests,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+
+class TraceRunHooks(RunHooks):
+    def __init__(self, trace: TurnTrace):
+        self.trace = trace
+
+    async def on_tool_start(self, context, agent, tool):
+        self.trace.tool_started(tool.name)
+
+    async def on_tool_end(self, context, agent, tool, result):
+        self.trace.tool_finished(tool.name)
+
+
+class PerfTraceWriter:
+    """Appends trace records to a size-rotated JSONL file"""
+
+    def __init__(self, path: str, max_bytes: int = 5_000_000, backup_count: int = 5):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._logger = logging.getLogger(f"perf_trace.{os.path.abspath(path)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def write(self, record: Dict[str, Any]):
+        self._logger.info(json.dumps(record))
+
+
+_writer: Optional[PerfTraceWriter] = None
+
+
+def get_trace_writer() -> Optional[PerfTraceWriter]:
+    """Shared writer configured by PERF_TRACE_FILE, or None when tracing is off"""
+    global _writer
+    path = os.getenv("PERF_TRACE_FILE")
+    if not path:
+        return None
+    if _writer is None or _writer.path != path:
+        _writer = PerfTraceWriter(
+            path, max_bytes=int(os.getenv("PERF_TRACE_MAX_BYTES", "5000000")))
+    return _writer
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """Read the trace file together with its rotated backups"""
+    records = []
+    for file_path in sorted(glob.glob(glob.escape(path) + ".*"), reverse=True) + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def build_report(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    agents: Dict[str, Dict[str, List[float]]] = {}
+    tools: Dict[str, List[float]] = {}
+
+    for record in records:
+        entry = agents.setdefault(record.get("agent") or "unknown", {
+            "ttft_ms": [], "total_ms": [], "turns": [], "total_tokens": []})
+        for key in ("ttft_ms", "total_ms", "turns"):
+            if record.get(key) is not None:
+                entry[key].append(record[key])
+        usage = record.get("usage") or {}
+        if usage.get("total_tokens") is not None:
+            entry["total_tokens"].append(usage["total_tokens"])
+        for tool in record.get("tools", []):
+            if tool.get("ms") is not None:
+                tools.setdefault(tool["name"], []).append(tool["ms"])
+
+    def summarize(values: List[float]) -> Dict[str, Any]:
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+        }
+
+    return {
+        "agents": {
+            name: {key: summarize(values) for key, values in entry.items()}
+            for name, entry in agents.items()
+        },
+        "tools": {name: summarize(values) for name, values in tools.items()},
+    }
+
+
+def print_report(report: Dict[str, Dict[str, Dict[str, Any]]]):
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    def fmt(value) -> str:
+        return "-" if value is None else f"{value:,.0f}"
+
+    agent_table = Table(title="Per-agent turn performance")
+    agent_table.add_column("Agent", style="cyan")
+    agent_table.add_column("Metric")
+    for column in ("Count", "p50", "p90", "p99"):
+        agent_table.add_column(column, justify="right")
+    for name, metrics in sorted(report["agents"].items()):
+        for metric, stats in metrics.items():
+            agent_table.add_row(name, metric, str(stats["count"]),
+                                fmt(stats["p50"]), fmt(stats["p90"]), fmt(stats["p99"]))
+    console.print(agent_table)
+
+    tool_table = Table(title="Per-tool latency (ms)")
+    tool_table.add_column("Tool", style="cyan")
+    for column in ("Calls", "p50", "p90", "p99"):
+        tool_table.add_column(column, justify="right")
+    for name, stats in sorted(report["tools"].items()):
+        tool_table.add_row(name, str(stats["count"]),
+                           fmt(stats["p50"]), fmt(stats["p90"]), fmt(stats["p99"]))
+    console.print(tool_table)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("PERF_TRACE_FILE", "perf_trace.jsonl")
+    records = load_records(path)
+    if not records:
+        print(f"No trace records found in {path}")
+        return
+    print_report(build_report(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.mcp import MCPServer
+
+from fast_path_router import find_tool
+
+# Tools most likely needed first for each domain: (candidate tool names, arguments)
+PREFETCH_PLANS: Dict[str, List[Tuple[List[str], Dict[str, Any]]]] = {
+    "orbital": [
+        (["get_iss_position"], {}),
+        (["get_satellite_tle"], {}),
+        (["get_people_in_space"], {}),
+    ],
+    "nasa": [
+        (["nasa/apod", "nasa_apod", "apod", "get_apod"], {}),
+    ],
+    "stac": [
+        (["get_collections", "list_collections", "stac/collections", "collections"], {}),
+    ],
+}
+
+
+def get_prefetch_plan(server_key: str) -> List[Tuple[List[str], Dict[str, Any]]]:
+    """Plan for a domain; PREFETCH_TOOLS (comma separated tool names) overrides the default"""
+    override = os.getenv("PREFETCH_TOOLS")
+    if override is not None:
+        return [([name.strip()], {}) for name in override.split(",") if name.strip()]
+    return PREFETCH_PLANS.get(server_key, [])
+
+
+async def prefetch(server: MCPServer, plan: List[Tuple[List[str], Dict[str, Any]]]) -> Dict[str, bool]:
+    """Call each planned tool once so the client and server caches are warm.
+
+    Returns whether each tool call succeeded; failures are never raised since
+    the user has not asked anything yet.
+    """
+
+    async def warm(tool_names: List[str], arguments: Dict[str, Any]) -> Tuple[str, bool]:
+        try:
+            found = await find_tool([server], tool_names)
+            if found is None:
+                return tool_names[0], False
+            _, tool_name = found
+            result = await server.call_tool(tool_name, arguments)
+            return tool_name, not result.isError
+        except Exception:
+            return tool_names[0], False
+
+    results = await asyncio.gather(*(warm(names, arguments) for names, arguments in plan))
+    return dict(results)
+
+
+def start_prefetch(server: MCPServer, server_key: str) -> Optional[asyncio.Task]:
+    """Start warming caches in the background while the user types the first query"""
+    plan = get_prefetch_plan(server_key)
+    if not plan:
+        return None
+    return asyncio.create_task(prefetch(server, plan))
@@ -0,0 +1,97 @@
+"""
+Opt-in profiling of individual queries and requests
+PROFILE_MODE=cprofile writes a .prof file per profiled block (for pstats or snakeviz);
+PROFILE_MODE=sample writes wall-clock stack samples of the calling thread in collapsed
+("folded") format for flamegraph.pl or speedscope. Profiles land in PROFILE_DIR.
+"""
+
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+PROFILE_MODE = os.getenv("PROFILE_MODE", "").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(".cache", "profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+_active = threading.local()
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                stack = ";".join(reversed(frames))
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+
+
+def _profile_path(label: str, extension: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "profile"
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+    return os.path.join(PROFILE_DIR, f"{safe_label}-{stamp}-{os.getpid()}.{extension}")
+
+
+@contextmanager
+def profile(label: str, mode: str = None) -> Iterator[None]:
+    """Profile the enclosed block when profiling is enabled.
+
+    Profiles cover the whole thread, so with asyncio they include any tasks that
+    ran concurrently. Nested or overlapping blocks are not profiled again.
+    """
+    mode = PROFILE_MODE if mode is None else mode
+    if mode not in ("cprofile", "sample") or getattr(_active, "profiling", False):
+        yield
+        return
+
+    _active.profiling = True
+    try:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(_profile_path(label, "prof"))
+        else:
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                sampler.write(_profile_path(label, "folded"))
+    finally:
+        _active.profiling = False
@@ -0,0 +1,120 @@
+"""
+Helpers for bounding load on upstream APIs
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def estimated_wait(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` more tokens could be acquired, ignoring other waiters"""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    The call runs as its own task, so a caller that is cancelled (e.g. by its
+    deadline) only stops waiting; the others still get the result. The call is
+    cancelled once nobody is waiting for it any more.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, Dict[str, Any]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._in_flight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(call())
+            entry = self._in_flight[key] = {"task": task, "waiters": 0}
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        finally:
+            entry["waiters"] -= 1
+            if not entry["waiters"] and not entry["task"].done():
+                entry["task"].cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        entry = self._in_flight.get(key)
+        if entry is not None and entry["task"] is task:
+            del self._in_flight[key]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets one trial call
+    through (half-open) once `reset_timeout` seconds have passed"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_progress = False
+        if self.failures >= self.failure_threshold or self._opened_at is not None:
+            self._opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """The caller gave up on the call; it counts as neither success nor failure"""
+        self._trial_in_progress = False
@@ -0,0 +1,167 @@
+import json
+from typing import Any, Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) without a tokenizer dependency"""
+    return (len(text) + 3) // 4
+
+
+class SessionMemory:
+    """Per-session conversation history kept within a token budget.
+
+    Each turn is stored as the list of input items produced by the Agents SDK
+    (user message, tool calls, tool outputs, assistant message). When the
+    history grows past the budget, tool outputs of older turns are truncated
+    first, then the oldest turns are folded into a short text summary. The
+    budget is only exceeded when the latest question and answer alone are
+    larger than it.
+    """
+
+    def __init__(self, token_budget: int = 8000, keep_recent_turns: int = 2,
+                 tool_output_tokens: int = 400, summary_answer_chars: int = 300):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_output_tokens = tool_output_tokens
+        self.summary_answer_chars = summary_answer_chars
+        self.turns: List[List[Dict[str, Any]]] = []
+        self.summary_lines: List[str] = []
+        self._history_length = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.token_budget > 0
+
+    def build_input(self, prompt: str) -> List[Dict[str, Any]]:
+        """Return the model input for a new turn: compacted history followed by the prompt"""
+        history = self._history_items() if self.enabled else []
+        self._history_length = len(history)
+        return history + [{"role": "user", "content": prompt}]
+
+    def record_run(self, user_input: str, items: List[Dict[str, Any]]):
+        """Store the items generated by the last run (as returned by `to_input_list()`)"""
+        if not self.enabled:
+            return
+
+        # Drop the replayed history and the wrapped prompt; keep the raw question
+        new_items = items[self._history_length + 1:]
+        self.record_turn(user_input, new_items)
+
+    def record_turn(self, user_input: str, new_items: List[Dict[str, Any]]):
+        """Store a completed turn and compact the history if it exceeds the budget"""
+        if not self.enabled:
+            return
+
+        turn = [{"role": "user", "content": user_input}] + list(new_items)
+        self.turns.append(turn)
+        self._compact()
+
+    def clear(self):
+        self.turns = []
+        self.summary_lines = []
+        self._history_length = 0
+
+    def token_count(self) -> int:
+        return sum(self._item_tokens(item) for item in self._history_items())
+
+    def _history_items(self) -> List[Dict[str, Any]]:
+        items = []
+        if self.summary_lines:
+            items.append({
+                "role": "system",
+                "content": "Summary of earlier conversation:\n" + "\n".join(self.summary_lines)
+            })
+        for turn in self.turns:
+            items.extend(turn)
+        return items
+
+    def _compact(self):
+        if self.token_count() <= self.token_budget:
+            return
+
+        # Step 1: shrink bulky tool outputs outside the most recent turns
+        older = self.turns[:-self.keep_recent_turns] if self.keep_recent_turns else self.turns
+        for turn in older:
+            self._truncate_tool_outputs(turn)
+        if self.token_count() <= self.token_budget:
+            return
+
+        # Step 2: fold the oldest turns into the summary, always keeping the latest one
+        while len(self.turns) > 1 and self.token_count() > self.token_budget:
+            self.summary_lines.append(self._summarize_turn(self.turns.pop(0)))
+
+        # Keep the summary itself bounded
+        summary_budget = self.token_budget // 4
+        while self.summary_lines and estimate_tokens("\n".join(self.summary_lines)) > summary_budget:
+            self.summary_lines.pop(0)
+
+        # Step 3: the latest turn alone is still too large; share what is left among its tool outputs
+        if self.token_count() > self.token_budget:
+            self._fit_tool_outputs(self.turns[-1])
+
+        # Step 4: give up the summary before going over budget
+        if self.token_count() > self.token_budget:
+            self.summary_lines = []
+
+    def _truncate_tool_outputs(self, turn: List[Dict[str, Any]]):
+        limit = self.tool_output_tokens * 4
+        for item in turn:
+            if item.get("type") == "function_call_output" and isinstance(item.get("output"), str):
+                item["output"] = self._truncate(item["output"], limit)
+
+    def _fit_tool_outputs(self, turn: List[Dict[str, Any]]):
+        outputs = [item for item in turn
+                   if item.get("type") == "function_call_output" and isinstance(item.get("output"), str)]
+        if not outputs:
+            return
+        originals = [item["output"] for item in outputs]
+        limit = max(len(output) for output in originals)
+        while True:
+            excess = self.token_count() - self.token_budget
+            if excess <= 0 or limit == 0:
+                return
+            # JSON escaping makes the estimate approximate, so shrink until it fits
+            limit = max(0, min(limit - 1, limit - excess * 4 // len(outputs)))
+            for item, original in zip(outputs, originals):
+                item["output"] = self._truncate(original, limit)
+
+    def _truncate(self, output: str, limit: int) -> str:
+        if len(output) <= limit:
+            return output
+        return output[:limit] + f"... [truncated {len(output) - limit} chars]"
+
+    def _summarize_turn(self, turn: List[Dict[str, Any]]) -> str:
+        question = ""
+        answer = ""
+        tools = []
+        for item in turn:
+            if item.get("role") == "user" and not question:
+                question = self._item_text(item)
+            elif item.get("type") == "function_call":
+                tools.append(item.get("name", "tool"))
+            elif item.get("role") == "assistant":
+                answer = self._item_text(item)
+
+        answer = " ".join(answer.split())
+        if len(answer) > self.summary_answer_chars:
+            answer = answer[:self.summary_answer_chars] + "..."
+
+        line = f"- User asked: {question.strip()}"
+        if tools:
+            line += f" (tools used: {', '.join(dict.fromkeys(tools))})"
+        if answer:
+            line += f" | Answer: {answer}"
+        return line
+
+    def _item_text(self, item: Dict[str, Any]) -> str:
+        content = item.get("content", "")
+        if isinstance(content, str):
+            return content
+        parts = []
+        for part in content or []:
+            if isinstance(part, dict) and isinstance(part.get("text"), str):
+                parts.append(part["text"])
+        return "".join(parts)
+
+    def _item_tokens(self, item: Dict[str, Any]) -> int:
+        return estimate_tokens(json.dumps(item, default=str))
@@ -0,0 +1,305 @@
+"""
+Spatio-temporal index of STAC items
+An R-tree (Sort-Tile-Recursive bulk load) over (lon, lat, time) boxes, plus the
+record of which query regions have already been answered completely.
+"""
+
+import json
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (min_lon, min_lat, min_time, max_lon, max_lat, max_time); time in epoch seconds
+Box = Tuple[float, float, float, float, float, float]
+
+MIN_TIME = -1e11
+MAX_TIME = 1e11
+
+
+def parse_time(value: Optional[str], end: bool = False) -> float:
+    """Parse an RFC 3339 timestamp (or '..' / empty for an open bound) to epoch seconds"""
+    if value in (None, "", ".."):
+        return MAX_TIME if end else MIN_TIME
+    value = value.strip().replace("Z", "+00:00")
+    if len(value) == 10:
+        # Plain dates cover the whole day
+        value += "T23:59:59.999999+00:00" if end else "T00:00:00+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_interval(datetime_param: Optional[str]) -> Tuple[float, float]:
+    """Parse a STAC `datetime` search parameter (instant or 'start/end')"""
+    if not datetime_param:
+        return MIN_TIME, MAX_TIME
+    if "/" in datetime_param:
+        start, end = datetime_param.split("/", 1)
+        return parse_time(start), parse_time(end, end=True)
+    instant = parse_time(datetime_param)
+    return instant, parse_time(datetime_param, end=True) if len(datetime_param) == 10 else instant
+
+
+def query_box(bbox: Sequence[float], datetime_param: Optional[str]) -> Box:
+    start, end = parse_interval(datetime_param)
+    return (bbox[0], bbox[1], start, bbox[2], bbox[3], end)
+
+
+def item_box(item: Dict[str, Any]) -> Optional[Box]:
+    """Footprint and acquisition time of a STAC item, or None if it cannot be placed"""
+    bbox = item.get("bbox") or _geometry_bbox(item.get("geometry"))
+    properties = item.get("properties") or {}
+    try:
+        if properties.get("datetime"):
+            start = end = parse_time(properties["datetime"])
+        else:
+            start = parse_time(properties.get("start_datetime"))
+            end = parse_time(properties.get("end_datetime"), end=True)
+    except ValueError:
+        return None
+    if not bbox or len(bbox) < 4:
+        return None
+    # 3D bboxes are [minx, miny, minz, maxx, maxy, maxz]
+    if len(bbox) == 6:
+        bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+    return (bbox[0], bbox[1], start, bbox[2], bbox[3], end)
+
+
+def _geometry_bbox(geometry: Optional[Dict[str, Any]]) -> Optional[List[float]]:
+    if not geometry or "coordinates" not in geometry:
+        return None
+    xs: List[float] = []
+    ys: List[float] = []
+
+    def walk(coordinates):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            xs.append(coordinates[0])
+            ys.append(coordinates[1])
+        else:
+            for child in coordinates:
+                walk(child)
+
+    walk(geometry["coordinates"])
+    if not xs:
+        return None
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def intersects(a: Box, b: Box) -> bool:
+    return (a[0] <= b[3] and b[0] <= a[3] and
+            a[1] <= b[4] and b[1] <= a[4] and
+            a[2] <= b[5] and b[2] <= a[5])
+
+
+def contains(outer: Box, inner: Box) -> bool:
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] <= inner[2] and
+            outer[3] >= inner[3] and outer[4] >= inner[4] and outer[5] >= inner[5])
+
+
+def subtract(a: Box, b: Box) -> List[Box]:
+    """Split `a` minus `b` into at most six disjoint boxes"""
+    if not intersects(a, b):
+        return [a]
+    pieces = []
+    lo = list(a[:3])
+    hi = list(a[3:])
+    for axis in range(3):
+        if lo[axis] < b[axis]:
+            piece_hi = list(hi)
+            piece_hi[axis] = b[axis]
+            pieces.append(tuple(lo) + tuple(piece_hi))
+            lo[axis] = b[axis]
+        if hi[axis] > b[axis + 3]:
+            piece_lo = list(lo)
+            piece_lo[axis] = b[axis + 3]
+            pieces.append(tuple(piece_lo) + tuple(hi))
+            hi[axis] = b[axis + 3]
+    return pieces
+
+
+def _union(boxes: Iterable[Box]) -> Box:
+    boxes = list(boxes)
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), min(b[2] for b in boxes),
+            max(b[3] for b in boxes), max(b[4] for b in boxes), max(b[5] for b in boxes))
+
+
+class STRTree:
+    """Static R-tree bulk loaded with Sort-Tile-Recursive packing"""
+
+    def __init__(self, entries: List[Tuple[Box, Any]], node_capacity: int = 16):
+        self.node_capacity = node_capacity
+        self.root = self._build(entries) if entries else None
+
+    def search(self, box: Box) -> List[Any]:
+        found: List[Any] = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            node_box, is_leaf, children = stack.pop()
+            if not intersects(node_box, box):
+                continue
+            if is_leaf:
+                found.extend(value for child_box, value in children if intersects(child_box, box))
+            else:
+                stack.extend(children)
+        return found
+
+    def _build(self, entries: List[Tuple[Box, Any]]):
+        # Leaves hold (box, value) pairs; inner nodes hold child nodes
+        level = [(_union(box for box, _ in group), True, group)
+                 for group in self._pack(entries, lambda entry: entry[0])]
+        while len(level) > 1:
+            level = [(_union(node[0] for node in group), False, group)
+                     for group in self._pack(level, lambda node: node[0])]
+        return level[0]
+
+    def _pack(self, entries: List[Any], box_of) -> List[List[Any]]:
+        capacity = self.node_capacity
+        node_count = math.ceil(len(entries) / capacity)
+        slices = max(1, math.ceil(node_count ** (1 / 3)))
+
+        def center(entry, axis):
+            box = box_of(entry)
+            return (box[axis] + box[axis + 3]) / 2
+
+        groups = []
+        by_x = sorted(entries, key=lambda entry: center(entry, 0))
+        x_size = math.ceil(len(by_x) / slices)
+        for i in range(0, len(by_x), x_size):
+            by_y = sorted(by_x[i:i + x_size], key=lambda entry: center(entry, 1))
+            y_size = math.ceil(len(by_y) / slices)
+            for j in range(0, len(by_y), y_size):
+                by_t = sorted(by_y[j:j + y_size], key=lambda entry: center(entry, 2))
+                for k in range(0, len(by_t), capacity):
+                    groups.append(by_t[k:k + capacity])
+        return groups
+
+
+class SpatioTemporalIndex:
+    """Cache of STAC items answering bbox/time searches that fall in already-answered regions.
+
+    Items live in an STR R-tree rebuilt in batches, with recent inserts kept in a
+    small buffer until the next rebuild. `coverage` records the query regions
+    (per search scope: collections and other filters) whose results were
+    complete, so a search inside them needs no upstream call. Items are evicted
+    least recently used first once `max_bytes` is exceeded, and any coverage
+    touching an evicted item is forgotten.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, rebuild_threshold: int = 256,
+                 settle_seconds: float = 2 * 86400, max_regions_per_scope: int = 64):
+        self.max_bytes = max_bytes
+        self.rebuild_threshold = rebuild_threshold
+        self.max_regions_per_scope = max_regions_per_scope
+        # Catalogs keep ingesting recent acquisitions, so the newest slice is never cached as complete
+        self.settle_seconds = settle_seconds
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.coverage: Dict[str, List[Box]] = {}
+        self.total_bytes = 0
+        self._tree = STRTree([])
+        self._buffer: List[str] = []
+        self._clock = 0
+
+    def scope_key(self, arguments: Dict[str, Any], ignore: Iterable[str]) -> str:
+        """Canonical key of every search argument that filters results besides bbox/datetime"""
+        ignored = set(ignore)
+        scope = {key: value for key, value in arguments.items() if key not in ignored}
+        if isinstance(scope.get("collections"), list):
+            scope["collections"] = sorted(scope["collections"])
+        return json.dumps(scope, sort_keys=True, default=str)
+
+    def search(self, box: Box, scope: str) -> Tuple[List[Dict[str, Any]], List[Box]]:
+        """Return cached items in `box` for `scope` and the parts of `box` not yet covered"""
+        remainder = [box]
+        for covered in self.coverage.get(scope, []):
+            remainder = [piece for part in remainder for piece in subtract(part, covered)]
+            if not remainder:
+                break
+
+        found = []
+        for item_id in self._candidates(box):
+            entry = self.items[item_id]
+            if scope in entry["scopes"] and intersects(entry["box"], box):
+                self._clock += 1
+                entry["last_used"] = self._clock
+                found.append(entry["item"])
+        return found, remainder
+
+    def add(self, items: List[Dict[str, Any]], scope: str, region: Optional[Box] = None) -> bool:
+        """Store items returned for `scope`; mark `region` covered when the result was complete.
+
+        Items without an id, footprint or parseable time cannot be indexed. Their
+        region is then left uncovered so a repeat search still reaches upstream.
+        Returns whether every item was indexed.
+        """
+        indexed_all = True
+        for item in items:
+            box = item_box(item)
+            item_id = item.get("id")
+            if box is None or item_id is None:
+                indexed_all = False
+                continue
+            key = f"{item.get('collection', '')}/{item_id}"
+            self._clock += 1
+            entry = self.items.get(key)
+            if entry is None:
+                size = len(json.dumps(item))
+                self.items[key] = {"box": box, "item": item, "size": size,
+                                   "scopes": {scope}, "last_used": self._clock}
+                self.total_bytes += size
+                self._buffer.append(key)
+            else:
+                entry["scopes"].add(scope)
+                entry["last_used"] = self._clock
+
+        if region is not None and indexed_all:
+            settled = time.time() - self.settle_seconds
+            if region[2] < settled:
+                region = region[:5] + (min(region[5], settled),)
+                regions = self.coverage.setdefault(scope, [])
+                # Drop regions the new one supersedes and keep the list short
+                regions[:] = [covered for covered in regions if not contains(region, covered)]
+                regions.append(region)
+                del regions[:-self.max_regions_per_scope]
+
+        if len(self._buffer) >= self.rebuild_threshold:
+            self._rebuild()
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+        return indexed_all
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self.items),
+            "bytes": self.total_bytes,
+            "covered_regions": sum(len(regions) for regions in self.coverage.values()),
+        }
+
+    def _candidates(self, box: Box) -> List[str]:
+        return self._tree.search(box) + [key for key in self._buffer if key in self.items]
+
+    def _rebuild(self):
+        self._tree = STRTree([(entry["box"], key) for key, entry in self.items.items()])
+        self._buffer = []
+
+    def _evict(self):
+        target = self.max_bytes * 0.9
+        evicted_boxes = []
+        for key in sorted(self.items, key=lambda key: self.items[key]["last_used"]):
+            if self.total_bytes <= target:
+                break
+            entry = self.items.pop(key)
+            self.total_bytes -= entry["size"]
+            evicted_boxes.append(entry["box"])
+
+        for scope, regions in list(self.coverage.items()):
+            kept = [region for region in regions
+                    if not any(intersects(region, box) for box in evicted_boxes)]
+            if kept:
+                self.coverage[scope] = kept
+            else:
+                del self.coverage[scope]
+        self._rebuild()
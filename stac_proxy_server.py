@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+STAC Proxy MCP Server
+Fronts the upstream STAC MCP server and answers bbox/time searches that fall in
+already-answered regions from a local spatio-temporal index
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_proxy import MCPProxyServer, result_json, serve, text_result
+from mcp_upstream import UpstreamMCPClient
+from stac_index import MAX_TIME, MIN_TIME, Box, SpatioTemporalIndex, query_box
+
+DEFAULT_UPSTREAM_COMMAND = "npx -y stac-mcp-server@latest"
+DEFAULT_SEARCH_TOOLS = "search,search_items,stac_search,search_stac,stac/search"
+
+# Beyond this many uncovered pieces a single upstream search is cheaper
+MAX_REMAINDER_PIECES = 8
+
+
+def format_interval(start: float, end: float) -> str:
+    def fmt(value: float, open_bound: bool) -> str:
+        if open_bound:
+            return ".."
+        return datetime.fromtimestamp(value, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+    return f"{fmt(start, start <= MIN_TIME)}/{fmt(end, end >= MAX_TIME)}"
+
+
+class STACProxyServer(MCPProxyServer):
+    def __init__(self, upstream: UpstreamMCPClient, index: SpatioTemporalIndex,
+                 search_tools: List[str]):
+        super().__init__("STAC Proxy MCP Server", upstream)
+        self.index = index
+        self.search_tools = set(search_tools)
+        # Search tools whose output turned out not to be FeatureCollection JSON
+        self.unindexable_tools = set()
+        self.counters = {"searches": 0, "local": 0, "partial": 0, "upstream": 0, "passthrough": 0}
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if tool_name in self.search_tools and tool_name not in self.unindexable_tools:
+            box = self._search_box(arguments)
+            if box is not None:
+                return await self.search(tool_name, arguments, box)
+        self.counters["passthrough"] += 1
+        return await self.upstream.call_tool(tool_name, arguments)
+
+    async def search(self, tool_name: str, arguments: Dict[str, Any], box: Box) -> Dict[str, Any]:
+        """Answer a search from the index, fetching only the uncovered remainder upstream"""
+        self.counters["searches"] += 1
+        scope = self.index.scope_key(arguments, ignore=("bbox", "datetime", "limit"))
+        limit = arguments.get("limit")
+
+        cached, remainder = self.index.search(box, scope)
+        if len(remainder) > MAX_REMAINDER_PIECES:
+            remainder = [box]
+
+        fetched: List[Dict[str, Any]] = []
+        if remainder:
+            results = await asyncio.gather(
+                *(self._fetch_piece(tool_name, arguments, scope, piece) for piece in remainder))
+            errors = [result for result, _ in results if result.get("isError")]
+            if errors:
+                return errors[0]
+            if any(features is None for _, features in results):
+                # Upstream answers in a shape we cannot index; stop intercepting this tool
+                self.unindexable_tools.add(tool_name)
+                self.counters["passthrough"] += 1
+                if remainder == [box]:
+                    return results[0][0]
+                return await self.upstream.call_tool(tool_name, arguments)
+            for _, features in results:
+                fetched.extend(features)
+            self.counters["partial" if cached else "upstream"] += 1
+        else:
+            self.counters["local"] += 1
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for item in cached + fetched:
+            merged[f"{item.get('collection', '')}/{item.get('id')}"] = item
+        features = sorted(
+            merged.values(),
+            key=lambda item: (item.get("properties") or {}).get("datetime") or "",
+            reverse=True)
+        if isinstance(limit, int) and limit > 0:
+            features = features[:limit]
+
+        return text_result({
+            "type": "FeatureCollection",
+            "features": features,
+            "numberReturned": len(features),
+            "proxy": {
+                "from_index": len(cached),
+                "from_upstream": len(fetched),
+                "upstream_requests": len(remainder),
+            },
+        })
+
+    async def _fetch_piece(self, tool_name: str, arguments: Dict[str, Any], scope: str,
+                           piece: Box) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        """Search one uncovered piece; returns the raw result and its features (None if unparseable)"""
+        piece_arguments = dict(arguments)
+        piece_arguments["bbox"] = [piece[0], piece[1], piece[3], piece[4]]
+        piece_arguments["datetime"] = format_interval(piece[2], piece[5])
+
+        result = await self.upstream.call_tool(tool_name, piece_arguments)
+        collection = result_json(result)
+        if not isinstance(collection, dict) or not isinstance(collection.get("features"), list):
+            return result, None
+        features = [item for item in collection["features"] if isinstance(item, dict)]
+
+        complete = self._is_complete(features, collection, arguments.get("limit"))
+        self.index.add(features, scope, region=piece if complete else None)
+        return result, features
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, index=self.index.stats(),
+                    unindexable_tools=sorted(self.unindexable_tools))
+
+    def _is_complete(self, features: List[Dict[str, Any]], collection: Dict[str, Any],
+                     limit: Any) -> bool:
+        """Only a result known to hold every match may mark its region as covered"""
+        matched = collection.get("numberMatched")
+        if matched is None:
+            matched = (collection.get("context") or {}).get("matched")
+        if isinstance(matched, int):
+            return matched <= len(features)
+        return isinstance(limit, int) and len(features) < limit
+
+    def _search_box(self, arguments: Dict[str, Any]) -> Optional[Box]:
+        bbox = arguments.get("bbox")
+        if not isinstance(bbox, list) or len(bbox) != 4:
+            return None
+        if not all(isinstance(value, (int, float)) for value in bbox):
+            return None
+        # Antimeridian-crossing boxes are left to the upstream server
+        if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            return None
+        try:
+            return query_box(bbox, arguments.get("datetime"))
+        except ValueError:
+            return None
+
+
+async def main():
+    upstream = UpstreamMCPClient.from_command_line(
+        os.getenv("STAC_UPSTREAM_COMMAND", DEFAULT_UPSTREAM_COMMAND),
+        env=dict(os.environ), client_name="stac-proxy")
+    index = SpatioTemporalIndex(
+        max_bytes=int(os.getenv("STAC_INDEX_MAX_BYTES", str(64 * 1024 * 1024))))
+    search_tools = os.getenv("STAC_SEARCH_TOOLS", DEFAULT_SEARCH_TOOLS).split(",")
+    await serve(STACProxyServer(upstream, index, [name.strip() for name in search_tools]))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+import json
+import time
+from fnmatch import fnmatch
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from resilience import SingleFlight
+
+# Seconds a tool result stays fresh, keyed by tool name pattern; unlisted tools are not cached
+DEFAULT_TTLS: Dict[str, float] = {
+    "get_iss_position": 5,
+    "get_people_in_space": 3600,
+    "get_satellite_tle": 3600,
+    "*apod*": 3600,
+    "*collections*": 3600,
+}
+
+
+class ToolResultCache:
+    """Client-side TTL cache for MCP tool results.
+
+    Concurrent calls for the same tool and arguments share one upstream call,
+    so a prefetch still in flight is awaited instead of duplicated.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, tool_name: str) -> float:
+        for pattern, ttl in self.ttls.items():
+            if fnmatch(tool_name.lower(), pattern):
+                return ttl
+        return 0
+
+    async def get_or_call(self, tool_name: str, arguments: Optional[Dict[str, Any]],
+                          call: Callable[[], Awaitable[Any]]) -> Any:
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0:
+            return await call()
+
+        key = (tool_name, json.dumps(arguments or {}, sort_keys=True))
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        if self._single_flight.in_flight(key):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        async def fetch():
+            result = await call()
+            if not getattr(result, "isError", False):
+                self._entries[key] = (time.monotonic() + ttl, result)
+            return result
+
+        return await self._single_flight.run(key, fetch)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,238 @@
+import json
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional
+
+from session_memory import estimate_tokens
+
+
+class ToolProjection:
+    """Describes how to reduce one tool's JSON output.
+
+    Paths are dotted, with `*` matching every element of a list or every value
+    of a dict, e.g. `features.*.assets.*`.
+
+    - keep: maps a path to the only fields retained on the objects found there
+      (fields may themselves be dotted, e.g. `properties.datetime`)
+    - drop: paths removed from the output
+    - max_items: lists longer than this are truncated and annotated with counts
+    """
+
+    def __init__(self, keep: Optional[Dict[str, List[str]]] = None,
+                 drop: Optional[List[str]] = None, max_items: Optional[int] = None):
+        self.keep = keep or {}
+        self.drop = drop or []
+        self.max_items = max_items
+
+
+# Projections keyed by tool name pattern; the first matching pattern wins
+DEFAULT_PROJECTIONS: Dict[str, ToolProjection] = {
+    "*neo*": ToolProjection(
+        keep={
+            "near_earth_objects.*.*": [
+                "id", "name", "absolute_magnitude_h", "is_potentially_hazardous_asteroid",
+                "estimated_diameter.kilometers", "close_approach_data",
+            ],
+            "near_earth_objects.*.*.close_approach_data.*": [
+                "close_approach_date_full", "relative_velocity.kilometers_per_second",
+                "miss_distance.kilometers", "orbiting_body",
+            ],
+        },
+        drop=["links"],
+        max_items=20,
+    ),
+    "*apod*": ToolProjection(
+        drop=["service_version", "*.service_version"],
+        max_items=15,
+    ),
+    "*mars*": ToolProjection(
+        keep={
+            "photos.*": ["id", "sol", "earth_date", "img_src", "camera.full_name", "rover.name"],
+        },
+        max_items=25,
+    ),
+    "*search*": ToolProjection(
+        keep={
+            "features.*": [
+                "id", "collection", "bbox", "assets", "properties.datetime",
+                "properties.eo:cloud_cover", "properties.platform", "properties.gsd",
+            ],
+            "features.*.assets.*": ["href", "type"],
+        },
+        drop=["links", "context"],
+        max_items=20,
+    ),
+    "*collection*": ToolProjection(
+        keep={
+            "collections.*": ["id", "title", "extent", "license"],
+        },
+        drop=["links"],
+        max_items=50,
+    ),
+}
+
+
+class ToolOutputShaper:
+    """Applies per-tool projections and size caps to MCP tool output text.
+
+    Keeps per-tool statistics of how much each tool's output was reduced.
+    """
+
+    def __init__(self, projections: Optional[Dict[str, ToolProjection]] = None,
+                 max_bytes: int = 32000, max_tokens: int = 4000):
+        self.projections = DEFAULT_PROJECTIONS if projections is None else projections
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def shape_result(self, tool_name: str, result):
+        """Return a copy of an MCP CallToolResult with its text content shaped"""
+        content = []
+        changed = False
+        for item in result.content:
+            if getattr(item, "type", None) == "text":
+                shaped = self.shape_text(tool_name, item.text)
+                if shaped != item.text:
+                    item = item.model_copy(update={"text": shaped})
+                    changed = True
+            content.append(item)
+
+        if not changed:
+            return result
+        return result.model_copy(update={"content": content})
+
+    def shape_text(self, tool_name: str, text: str) -> str:
+        """Shape a single text payload, falling back to plain truncation for non-JSON"""
+        bytes_in = len(text.encode("utf-8"))
+
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            shaped = self._truncate_text(text)
+        else:
+            projection = self._find_projection(tool_name)
+            if projection is not None:
+                data = self._project(data, projection)
+            shaped = self._fit(data, projection.max_items if projection else None)
+            if len(shaped) >= len(text) and self._within_caps(text):
+                shaped = text
+
+        self._record(tool_name, bytes_in, len(shaped.encode("utf-8")))
+        return shaped
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool call counts, byte totals and reduction percentage"""
+        report = {}
+        for tool_name, entry in self._stats.items():
+            reduction = 0.0
+            if entry["bytes_in"]:
+                reduction = 100.0 * (1 - entry["bytes_out"] / entry["bytes_in"])
+            report[tool_name] = dict(entry, reduction_pct=round(reduction, 1))
+        return report
+
+    def _find_projection(self, tool_name: str) -> Optional[ToolProjection]:
+        for pattern, projection in self.projections.items():
+            if fnmatch(tool_name.lower(), pattern):
+                return projection
+        return None
+
+    def _project(self, data: Any, projection: ToolProjection) -> Any:
+        for path in projection.drop:
+            self._drop_path(data, path.split("."))
+        # Apply shallower keep paths first so deeper ones see the projected objects
+        for path in sorted(projection.keep, key=lambda p: p.count(".")):
+            fields = projection.keep[path]
+            data = self._map_path(data, path.split(".") if path else [],
+                                  lambda obj: self._keep_fields(obj, fields))
+        return data
+
+    def _fit(self, data: Any, max_items: Optional[int]) -> str:
+        """Serialize, halving list lengths until the payload fits the caps"""
+        limit = max_items
+        while True:
+            trimmed = self._truncate_lists(data, limit) if limit is not None else data
+            text = json.dumps(trimmed)
+            if self._within_caps(text):
+                return text
+            if limit is None:
+                limit = 64
+            elif limit > 1:
+                limit //= 2
+            else:
+                return self._truncate_text(text)
+
+    def _within_caps(self, text: str) -> bool:
+        return len(text.encode("utf-8")) <= self.max_bytes and estimate_tokens(text) <= self.max_tokens
+
+    def _truncate_text(self, text: str) -> str:
+        if self._within_caps(text):
+            return text
+        limit = min(self.max_bytes, self.max_tokens * 4)
+        return text[:limit] + f"\n... [truncated {len(text) - limit} chars]"
+
+    def _truncate_lists(self, data: Any, max_items: int) -> Any:
+        if isinstance(data, list):
+            items = [self._truncate_lists(item, max_items) for item in data[:max_items]]
+            if len(data) > max_items:
+                items.append(f"... {len(data) - max_items} more items omitted ({len(data)} total)")
+            return items
+        if isinstance(data, dict):
+            return {key: self._truncate_lists(value, max_items) for key, value in data.items()}
+        return data
+
+    def _map_path(self, data: Any, parts: List[str], func) -> Any:
+        if not parts:
+            return func(data)
+        head, rest = parts[0], parts[1:]
+        if head == "*":
+            if isinstance(data, list):
+                return [self._map_path(item, rest, func) for item in data]
+            if isinstance(data, dict):
+                return {key: self._map_path(value, rest, func) for key, value in data.items()}
+            return data
+        if isinstance(data, dict) and head in data:
+            data = dict(data)
+            data[head] = self._map_path(data[head], rest, func)
+        return data
+
+    def _drop_path(self, data: Any, parts: List[str]):
+        head, rest = parts[0], parts[1:]
+        if isinstance(data, list):
+            targets = data if head == "*" else []
+        elif isinstance(data, dict):
+            if not rest:
+                if head == "*":
+                    data.clear()
+                else:
+                    data.pop(head, None)
+                return
+            targets = list(data.values()) if head == "*" else [data[head]] if head in data else []
+        else:
+            return
+        for target in targets:
+            if rest:
+                self._drop_path(target, rest)
+
+    def _keep_fields(self, obj: Any, fields: List[str]) -> Any:
+        if not isinstance(obj, dict):
+            return obj
+        kept: Dict[str, Any] = {}
+        for field in fields:
+            self._copy_field(obj, kept, field.split("."))
+        return kept
+
+    def _copy_field(self, source: Dict[str, Any], target: Dict[str, Any], parts: List[str]):
+        head = parts[0]
+        # Field names such as "eo:cloud_cover" never contain dots, so splitting is safe
+        if head not in source:
+            return
+        if len(parts) == 1:
+            target[head] = source[head]
+        elif isinstance(source[head], dict):
+            self._copy_field(source[head], target.setdefault(head, {}), parts[1:])
+
+    def _record(self, tool_name: str, bytes_in: int, bytes_out: int):
+        entry = self._stats.setdefault(
+            tool_name, {"calls": 0, "bytes_in": 0, "bytes_out": 0})
+        entry["calls"] += 1
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out